@@ -0,0 +1,84 @@
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+from adoption.gateway import SESSION_PATH
+
+
+class FakeGatewayHandler(BaseHTTPRequestHandler):
+    """
+    Answer SSLCOMMERZ session requests like the sandbox, after the server's
+    ``latency`` seconds and failing with a 503 at its ``failure_rate``
+    """
+
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written separately; don't wait for delayed ACKs
+    # on kept-alive connections
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = parse_qs(self.rfile.read(length).decode())
+        self.server.requests += 1
+        time.sleep(self.server.latency)
+        if self.path != SESSION_PATH:
+            return self.reply(404, {"status": "FAILED", "failedreason": "Not found"})
+        if random.random() < self.server.failure_rate:
+            return self.reply(503, {"status": "FAILED", "failedreason": "Busy"})
+        self.server.sessions += 1
+        if not body.get("store_id") or not body.get("total_amount"):
+            return self.reply(
+                200, {"status": "FAILED", "failedreason": "Missing parameters"}
+            )
+        session = uuid.uuid4().hex
+        self.reply(
+            200,
+            {
+                "status": "SUCCESS",
+                "sessionkey": session,
+                "GatewayPageURL": (
+                    f"http://{self.headers['Host']}/gwprocess/v4/gw.php?Q=pay"
+                    f"&SESSIONKEY={session}"
+                ),
+            },
+        )
+
+    def reply(self, status, payload):
+        content = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeGateway(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address=("127.0.0.1", 0), latency=0.0, failure_rate=0.0):
+        super().__init__(address, FakeGatewayHandler)
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.requests = 0
+        self.sessions = 0
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        """Serve from a daemon thread and return self"""
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
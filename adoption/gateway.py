@@ -0,0 +1,200 @@
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import MaxRetryError, NewConnectionError
+
+logger = logging.getLogger(__name__)
+
+_gateway = None
+_gateway_lock = threading.Lock()
+
+SESSION_PATH = "/gwprocess/v4/api.php"
+
+
+class GatewayError(Exception):
+    """The gateway could not be reached or answered with an error"""
+
+    retryable = False
+
+
+class GatewayNotConfigured(GatewayError):
+    """The store credentials are missing from PAYMENT_GATEWAY"""
+
+
+class GatewayUnavailable(GatewayError):
+    """The circuit breaker is open, calls are refused without trying"""
+
+    def __init__(self, retry_after):
+        super().__init__("Payment gateway unavailable")
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Open after ``failure_threshold`` consecutive failures and refuse calls
+    for ``reset_timeout`` seconds, then let one call through: it closes the
+    breaker when it succeeds and opens it again when it fails.
+    """
+
+    def __init__(self, failure_threshold, reset_timeout):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+        self.lock = threading.Lock()
+
+    def before_call(self):
+        with self.lock:
+            if self.opened_at is None:
+                return
+            remaining = self.opened_at + self.reset_timeout - time.monotonic()
+            if remaining > 0 or self.probing:
+                raise GatewayUnavailable(max(remaining, 0))
+            self.probing = True
+
+    def succeeded(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.probing = False
+
+    def failed(self):
+        with self.lock:
+            self.failures += 1
+            if self.probing or self.failures >= self.failure_threshold:
+                if self.opened_at is None:
+                    logger.warning("Payment gateway circuit opened")
+                self.opened_at = time.monotonic()
+            self.probing = False
+
+    def abandoned(self):
+        """The call ended without an outcome (e.g. cancelled): let another probe"""
+        with self.lock:
+            self.probing = False
+
+
+def connect_failed(error):
+    """Whether ``error`` happened before the request reached the gateway"""
+    if isinstance(error, requests.ConnectTimeout):
+        return True
+    reason = error.args[0] if error.args else None
+    return isinstance(error, requests.ConnectionError) and (
+        isinstance(reason, MaxRetryError)
+        and isinstance(reason.reason, NewConnectionError)
+    )
+
+
+class PaymentGateway:
+    """
+    SSLCOMMERZ client sharing one pooled HTTP session per process. The
+    blocking calls run on a thread pool as large as the connection pool,
+    so async views keep serving other requests meanwhile. Calls are behind
+    a circuit breaker; creating a session isn't idempotent, so only
+    connection failures, where nothing reached the gateway, are retried
+    (with exponential backoff).
+    """
+
+    def __init__(self, options):
+        if not (options["STORE_ID"] and options["STORE_PASSWORD"]):
+            raise GatewayNotConfigured(
+                "Set SSLCOMMERZ_STORE_ID and SSLCOMMERZ_STORE_PASSWORD"
+            )
+        self.base_url = options["BASE_URL"].rstrip("/")
+        self.store_id = options["STORE_ID"]
+        self.store_password = options["STORE_PASSWORD"]
+        self.timeout = (options["CONNECT_TIMEOUT"], options["READ_TIMEOUT"])
+        self.max_attempts = options["MAX_ATTEMPTS"]
+        self.retry_delay = options["RETRY_DELAY"]
+        self.breaker = CircuitBreaker(
+            options["FAILURE_THRESHOLD"], options["RESET_TIMEOUT"]
+        )
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_maxsize=options["POOL_SIZE"])
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.executor = ThreadPoolExecutor(
+            max_workers=options["POOL_SIZE"], thread_name_prefix="payment-gateway"
+        )
+
+    def post(self, path, data):
+        """
+        One blocking POST; returns the decoded JSON answer. Raises
+        GatewayError, with ``retryable`` set when the request wasn't sent.
+        """
+        try:
+            response = self.session.post(
+                self.base_url + path, data=data, timeout=self.timeout
+            )
+            response.raise_for_status()
+            return response.json()
+        except (requests.RequestException, ValueError) as error:
+            gateway_error = GatewayError(str(error))
+            gateway_error.retryable = connect_failed(error)
+            raise gateway_error from error
+
+    async def call(self, path, data):
+        self.breaker.before_call()
+        loop = asyncio.get_running_loop()
+        settled = False
+        try:
+            for attempt in range(1, self.max_attempts + 1):
+                try:
+                    result = await loop.run_in_executor(
+                        self.executor, self.post, path, data
+                    )
+                except GatewayError as error:
+                    logger.warning(
+                        "Payment gateway call failed (attempt %s/%s): %s",
+                        attempt,
+                        self.max_attempts,
+                        error,
+                    )
+                    if error.retryable and attempt < self.max_attempts:
+                        await asyncio.sleep(self.retry_delay * 2 ** (attempt - 1))
+                        continue
+                    settled = True
+                    self.breaker.failed()
+                    raise
+                settled = True
+                self.breaker.succeeded()
+                return result
+        finally:
+            if not settled:
+                self.breaker.abandoned()
+
+    async def create_session(self, post_body):
+        """Start a checkout session, like SSLCOMMERZ.createSession()"""
+        data = {
+            **post_body,
+            "store_id": self.store_id,
+            "store_passwd": self.store_password,
+        }
+        return await self.call(SESSION_PATH, data)
+
+    def close(self):
+        self.executor.shutdown(wait=False)
+        self.session.close()
+
+
+def get_gateway():
+    global _gateway
+    with _gateway_lock:
+        if _gateway is None:
+            _gateway = PaymentGateway(settings.PAYMENT_GATEWAY)
+        return _gateway
+
+
+def reset_gateway():
+    """Drop the shared client, e.g. after changing PAYMENT_GATEWAY"""
+    global _gateway
+    with _gateway_lock:
+        if _gateway is not None:
+            _gateway.close()
+        _gateway = None
@@ -0,0 +1,146 @@
+import asyncio
+import json
+import time
+
+import requests
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.core.handlers.asgi import ASGIHandler
+from django.test.utils import override_settings
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import AccessToken
+from adoption.fake_gateway import FakeGateway
+from adoption.gateway import SESSION_PATH, reset_gateway
+from api.benchmarks import seed_samples, summarize, throwaway_database
+from api.management.commands.benchmark_connections import connection_settings
+
+
+class Command(BaseCommand):
+    help = (
+        "Initiate payments against the fake gateway: one at a time with a new "
+        "HTTP connection per call, as a sync worker did through the SDK, then "
+        "concurrently through the async view in a single event loop"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=100)
+        parser.add_argument(
+            "--concurrency", type=int, nargs="+", default=[1, 10, 50]
+        )
+        parser.add_argument(
+            "--latency", type=float, default=200, help="Gateway milliseconds"
+        )
+
+    def handle(self, *args, **options):
+        gateway = FakeGateway(latency=options["latency"] / 1000).start()
+        config = {
+            **settings.PAYMENT_GATEWAY,
+            "BASE_URL": gateway.url,
+            "STORE_ID": "bench",
+            "STORE_PASSWORD": "bench",
+            "POOL_SIZE": max(options["concurrency"]),
+        }
+        results = {}
+        try:
+            with throwaway_database(), override_settings(PAYMENT_GATEWAY=config):
+                reset_gateway()
+                user = seed_samples()["user"]
+                results["sync-sdk"] = self.sync_sdk(gateway.url, options)
+                # As recommended for ASGI: requests each run in a thread of
+                # their own, which must not keep its connection open
+                with connection_settings(CONN_MAX_AGE=0):
+                    for concurrency in options["concurrency"]:
+                        results[f"async-view x{concurrency}"] = asyncio.run(
+                            self.async_view(user, concurrency, options)
+                        )
+        finally:
+            reset_gateway()
+            gateway.stop()
+
+        self.stdout.write(
+            f"{'mode':<18} {'init/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}"
+        )
+        for mode, (throughput, latency) in results.items():
+            self.stdout.write(
+                f"{mode:<18} {throughput:>8.1f} {latency['p50']:>8} "
+                f"{latency['p95']:>8} {latency['p99']:>8}"
+            )
+
+    def sync_sdk(self, url, options):
+        """What initiate_payment did: a fresh requests.post() per call"""
+        seconds = []
+        start = time.perf_counter()
+        for i in range(options["requests"]):
+            begin = time.perf_counter()
+            response = requests.post(
+                url + SESSION_PATH,
+                data={"store_id": "bench", "total_amount": 10, "tran_id": i},
+            )
+            seconds.append(time.perf_counter() - begin)
+            if response.json().get("status") != "SUCCESS":
+                raise CommandError(f"Gateway answered {response.text}")
+        return options["requests"] / (time.perf_counter() - start), summarize(seconds)
+
+    async def async_view(self, user, concurrency, options):
+        handler = ASGIHandler()
+        authorization = f"JWT {AccessToken.for_user(user)}"
+        url = reverse("initiate-payment")
+        slots = asyncio.Semaphore(concurrency)
+        seconds = []
+
+        async def initiate(i):
+            async with slots:
+                begin = time.perf_counter()
+                status = await post(
+                    handler, url, {"amount": "10.00", "adoptionId": i}, authorization
+                )
+                seconds.append(time.perf_counter() - begin)
+            if status != 200:
+                raise CommandError(f"{url} returned {status}")
+
+        start = time.perf_counter()
+        await asyncio.gather(*(initiate(i) for i in range(options["requests"])))
+        return options["requests"] / (time.perf_counter() - start), summarize(seconds)
+
+
+async def post(handler, path, payload, authorization):
+    """
+    POST ``payload`` as JSON through the ASGI handler like a server would, so
+    that request_finished closes the connection of the request's thread (the
+    async test client skips that). Returns the response status.
+    """
+    body = json.dumps(payload).encode()
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "server": ("testserver", 80),
+        "client": ("127.0.0.1", 0),
+        "headers": [
+            (b"host", b"testserver"),
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"authorization", authorization.encode()),
+        ],
+    }
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+    statuses = []
+
+    async def receive():
+        if messages:
+            return messages.pop()
+        # Only asked again to watch for a disconnect: never comes
+        await asyncio.Future()
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            statuses.append(message["status"])
+
+    await handler(scope, receive, send)
+    return statuses[0]
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+from adoption.fake_gateway import FakeGateway
+
+
+class Command(BaseCommand):
+    help = (
+        "Run a local stand-in for the SSLCOMMERZ session API; point "
+        "SSLCOMMERZ_BASE_URL at it to initiate payments offline"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8900)
+        parser.add_argument(
+            "--latency", type=float, default=200, help="Milliseconds per answer"
+        )
+        parser.add_argument(
+            "--failure-rate",
+            type=float,
+            default=0.0,
+            help="Share of requests answered with a 503",
+        )
+
+    def handle(self, *args, **options):
+        server = FakeGateway(
+            (options["host"], options["port"]),
+            latency=options["latency"] / 1000,
+            failure_rate=options["failure_rate"],
+        )
+        self.stdout.write(f"Fake payment gateway on {server.url} (Ctrl-C to stop)")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.4 on 2026-10-17 04:06
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('adoption', '0003_payment'),
+        ('pet', '0007_hot_path_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='adoptionhistory',
+            index=models.Index(fields=['adopt', 'pet'], name='adoption_adopt_pet_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['user', '-created_at'], name='payment_user_created_idx'),
+        ),
+    ]
@@ -15,11 +15,47 @@ class Adopt(models.Model):
         return f"Adoption {self.id} by {self.user.first_name}"
 
 
+class AdoptionHistoryQuerySet(models.QuerySet):
+    def with_details(self, serializer=None):
+        """
+        Load everything AdoptionHistorySerializer reads, or only what the
+        fields left on a projected ``serializer`` instance read.
+        """
+        if serializer is None:
+            return (
+                self.select_related("pet", "adopt")
+                .defer("pet__search_vector")
+                .prefetch_related("pet__images")
+            )
+
+        queryset = self
+        if "adopted_at" in serializer.fields:
+            queryset = queryset.select_related("adopt")
+        pet = serializer.fields.get("pet")
+        if pet is not None:
+            queryset = queryset.select_related("pet").defer(
+                *(f"pet__{name}" for name in pet.get_deferred_fields())
+            )
+            if "images" in pet.fields:
+                queryset = queryset.prefetch_related("pet__images")
+        return queryset
+
+    def for_user(self, user, serializer=None):
+        return self.filter(adopt__user=user).with_details(serializer)
+
+
 class AdoptionHistory(models.Model):
     adopt = models.ForeignKey(Adopt, on_delete=models.CASCADE, related_name="adoptions")
     pet = models.ForeignKey(Pet, on_delete=models.CASCADE)
     price = models.DecimalField(max_digits=10, decimal_places=2)
 
+    objects = AdoptionHistoryQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["adopt", "pet"], name="adoption_adopt_pet_idx"),
+        ]
+
     def __str__(self):
         return f"{self.pet.name} adopted by {self.adopt.user.first_name}"
 
@@ -35,5 +71,12 @@ class Payment(models.Model):
     status = models.CharField(max_length=30, default="Completed")
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["user", "-created_at"], name="payment_user_created_idx"
+            ),
+        ]
+
     def __str__(self):
         return f"{self.user.username} - {self.amount} - {self.status}"
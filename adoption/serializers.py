@@ -1,10 +1,12 @@
 from rest_framework import serializers
-from adoption.models import Adopt, AdoptionHistory, Payment
+from adoption.models import AdoptionHistory, Payment
+from adoption.services import adopt_pet, adopt_pets
+from api.serializers import DynamicFieldsMixin
 from pet.models import Pet
 from pet.serializers import PetImageSerializer
 
 
-class SimplePetSerializer(serializers.ModelSerializer):
+class SimplePetSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     images = PetImageSerializer(many=True, read_only=True)
 
     class Meta:
@@ -12,7 +14,7 @@ class SimplePetSerializer(serializers.ModelSerializer):
         fields = ["id", "name", "category", "price", "images"]
 
 
-class AdoptionHistorySerializer(serializers.ModelSerializer):
+class AdoptionHistorySerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     pet = SimplePetSerializer(read_only=True)
     adopted_at = serializers.SerializerMethodField()
 
@@ -20,6 +22,9 @@ class AdoptionHistorySerializer(serializers.ModelSerializer):
         model = AdoptionHistory
         fields = ["id", "pet", "adopted_at", "price"]
 
+    # get_adopted_at() for the api.fast list path
+    fast_method_fields = {"adopted_at": (("adopt__adopted_at",), lambda value: value)}
+
     def get_adopted_at(self, obj):
         return obj.adopt.adopted_at
 
@@ -31,39 +36,22 @@ class CreateAdoptionSerializer(serializers.ModelSerializer):
         model = AdoptionHistory
         fields = ["pet_id"]
 
-    def validate_pet_id(self, value):
-        if not Pet.objects.filter(pk=value).exists():
-            raise serializers.ValidationError(f"Pet with id {value} does not exist")
-        return value
-
     def create(self, validated_data):
         user = self.context["request"].user
-        pet_id = validated_data["pet_id"]
-        pet = Pet.objects.get(id=pet_id)
-
-        adopt = Adopt.objects.filter(user=user).first()
-        if not adopt:
-            adopt = Adopt.objects.create(user=user)
-
-        if pet.price > user.account_balance:
-            raise serializers.ValidationError(
-                "You do not have sufficient balance to adopt this pet"
-            )
+        return adopt_pet(user, validated_data["pet_id"])
 
-        if AdoptionHistory.objects.filter(adopt=adopt, pet=pet).exists():
-            raise serializers.ValidationError("already adopted this pet")
 
-        user.account_balance -= pet.price
-        user.save(update_fields=["account_balance"])
+class BulkAdoptionSerializer(serializers.Serializer):
+    pet_ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=100,
+        write_only=True,
+    )
 
-        adoption_history = AdoptionHistory.objects.create(
-            adopt=adopt, pet=pet, price=pet.price
-        )
-
-        pet.availability = False
-        pet.save(update_fields=["availability"])
-
-        return adoption_history
+    def create(self, validated_data):
+        user = self.context["request"].user
+        return adopt_pets(user, validated_data["pet_ids"])
 
 
 class PaymentSerializer(serializers.ModelSerializer):
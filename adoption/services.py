@@ -0,0 +1,139 @@
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Now
+from rest_framework import exceptions, serializers
+from adoption.models import Adopt, AdoptionHistory
+from pet.counts import apply_adoption_deltas
+from pet.models import Pet
+from users.models import User
+
+
+class PetsUnavailable(exceptions.APIException):
+    status_code = 400
+    default_detail = "Some of the requested pets cannot be adopted"
+    default_code = "pets_unavailable"
+
+    def __init__(self, missing, unavailable):
+        super().__init__()
+        self.detail = {
+            "detail": self.default_detail,
+            "missing": missing,
+            "unavailable": unavailable,
+        }
+
+
+def get_or_create_adopt(user):
+    adopt = Adopt.objects.filter(user=user).first()
+    if adopt is None:
+        adopt = Adopt.objects.create(user=user)
+    return adopt
+
+
+def adopt_pet(user, pet_id):
+    """
+    Adopt a pet for ``user`` in a single transaction.
+
+    The pet row is locked while its price and availability are read, the
+    balance is debited with a conditional UPDATE that only matches when it
+    covers the price, and the pet is flipped with a conditional UPDATE on
+    ``availability``. Two buyers can therefore never adopt the same pet and
+    a balance can never go negative, even on backends without row locks.
+    """
+    with transaction.atomic():
+        pet = (
+            Pet.objects.select_for_update()
+            .defer("search_vector")
+            .filter(pk=pet_id)
+            .first()
+        )
+        if pet is None:
+            raise serializers.ValidationError(
+                {"pet_id": [f"Pet with id {pet_id} does not exist"]}
+            )
+
+        if not pet.availability:
+            if AdoptionHistory.objects.filter(adopt__user=user, pet=pet).exists():
+                raise serializers.ValidationError("already adopted this pet")
+            raise serializers.ValidationError("This pet is no longer available")
+
+        debited = User.objects.filter(
+            pk=user.pk, account_balance__gte=pet.price
+        ).update(account_balance=F("account_balance") - pet.price)
+        if not debited:
+            raise serializers.ValidationError(
+                "You do not have sufficient balance to adopt this pet"
+            )
+
+        flipped = Pet.objects.filter(pk=pet.pk, availability=True).update(
+            availability=False, updated_at=Now()
+        )
+        if not flipped:
+            # Only reachable where SELECT ... FOR UPDATE is a no-op (SQLite);
+            # raising rolls the debit back.
+            raise serializers.ValidationError("This pet is no longer available")
+
+        adoption_history = AdoptionHistory.objects.create(
+            adopt=get_or_create_adopt(user), pet=pet, price=pet.price
+        )
+        apply_adoption_deltas([pet])
+
+    # A deferred balance (users.authentication) is read fresh on access
+    if "account_balance" not in user.get_deferred_fields():
+        user.account_balance -= pet.price
+    return adoption_history
+
+
+def adopt_pets(user, pet_ids):
+    """
+    Adopt several pets at once, all or nothing.
+
+    The pets are locked with one query (in id order, so concurrent batches
+    can't deadlock), the balance is debited once for the total, all history
+    rows are written with ``bulk_create`` and availability is flipped with a
+    single UPDATE. Missing or unavailable pets abort the whole batch with
+    ``PetsUnavailable`` listing them.
+    """
+    pet_ids = sorted(set(pet_ids))
+    with transaction.atomic():
+        pets = list(
+            Pet.objects.select_for_update()
+            .defer("search_vector")
+            .filter(pk__in=pet_ids)
+            .order_by("pk")
+        )
+        found = {pet.pk for pet in pets}
+        missing = [pk for pk in pet_ids if pk not in found]
+        unavailable = [pet.pk for pet in pets if not pet.availability]
+        if missing or unavailable:
+            raise PetsUnavailable(missing, unavailable)
+
+        total = sum(pet.price for pet in pets)
+        debited = User.objects.filter(
+            pk=user.pk, account_balance__gte=total
+        ).update(account_balance=F("account_balance") - total)
+        if not debited:
+            raise serializers.ValidationError(
+                "You do not have sufficient balance to adopt these pets"
+            )
+
+        flipped = Pet.objects.filter(pk__in=pet_ids, availability=True).update(
+            availability=False, updated_at=Now()
+        )
+        if flipped != len(pets):
+            unavailable = list(
+                Pet.objects.filter(pk__in=pet_ids, availability=False).values_list(
+                    "pk", flat=True
+                )
+            )
+            raise PetsUnavailable([], unavailable)
+
+        adopt = get_or_create_adopt(user)
+        adoption_histories = AdoptionHistory.objects.bulk_create(
+            AdoptionHistory(adopt=adopt, pet=pet, price=pet.price) for pet in pets
+        )
+        apply_adoption_deltas(pets)
+
+    # A deferred balance (users.authentication) is read fresh on access
+    if "account_balance" not in user.get_deferred_fields():
+        user.account_balance -= total
+    return adoption_histories
@@ -1,3 +1,326 @@
-from django.test import TestCase
+import asyncio
+import random
+import socket
+import threading
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.db import connection
+from django.db.models import Count, Sum
+from django.test import (
+    SimpleTestCase,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+    skipUnlessDBFeature,
+)
+from django.urls import reverse
+from rest_framework.exceptions import ValidationError
+from rest_framework_simplejwt.tokens import AccessToken
+from adoption.fake_gateway import FakeGateway
+from adoption.gateway import (
+    SESSION_PATH,
+    GatewayError,
+    GatewayNotConfigured,
+    PaymentGateway,
+    reset_gateway,
+)
+from adoption.models import AdoptionHistory
+from adoption.services import PetsUnavailable, adopt_pet, adopt_pets
+from pet.models import Category, Pet
+from users.models import User
+
+
+# SQLite serializes writers and fails concurrent ones with "database is locked"
+@skipUnlessDBFeature("has_select_for_update")
+class ConcurrentAdoptionTests(TransactionTestCase):
+    """
+    Hammer adopt_pet() and adopt_pets() from many threads and check that no
+    pet is adopted twice, no balance goes negative and the category counts
+    stay exact.
+    """
+
+    threads = 8
+    pets = 12
+    users = 4
+    attempts = 15
+    price = Decimal("10.00")
+
+    def setUp(self):
+        self.category = Category.objects.create(name="Stress")
+        self.pet_ids = [
+            Pet.objects.create(
+                name=f"Pet {i}",
+                category=self.category,
+                breed="Mixed",
+                age=1,
+                description="Friendly",
+                availability=True,
+                price=self.price,
+            ).pk
+            for i in range(self.pets)
+        ]
+        # Every user can afford a third of the pets, so balances run out
+        self.balance = self.price * (self.pets // 3)
+        self.user_ids = [
+            User.objects.create_user(
+                email=f"stress-{i}@example.com", account_balance=self.balance
+            ).pk
+            for i in range(self.users)
+        ]
+
+    def adopt_concurrently(self, adopt):
+        errors = []
+        start = threading.Barrier(self.threads)
+
+        def worker(seed):
+            picker = random.Random(seed)
+            start.wait()
+            try:
+                for _ in range(self.attempts):
+                    user = User.objects.get(pk=picker.choice(self.user_ids))
+                    try:
+                        adopt(user, picker)
+                    except (ValidationError, PetsUnavailable):
+                        pass
+            except Exception as exc:  # noqa: BLE001 - reported by the test
+                errors.append(exc)
+            finally:
+                connection.close()
+
+        threads = [
+            threading.Thread(target=worker, args=(seed,))
+            for seed in range(self.threads)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return errors
+
+    def test_no_double_adoptions_or_overdrafts(self):
+        errors = self.adopt_concurrently(
+            lambda user, picker: adopt_pet(user, picker.choice(self.pet_ids))
+        )
+        self.assertEqual(errors, [])
+        self.assertConsistent()
+
+    def test_no_double_adoptions_in_overlapping_batches(self):
+        errors = self.adopt_concurrently(
+            lambda user, picker: adopt_pets(user, picker.sample(self.pet_ids, 2))
+        )
+        self.assertEqual(errors, [])
+        self.assertConsistent()
+
+    def assertConsistent(self):
+
+        histories = AdoptionHistory.objects.filter(pet_id__in=self.pet_ids)
+        self.assertFalse(
+            histories.values("pet_id").annotate(n=Count("id")).filter(n__gt=1)
+        )
+        adopted = set(histories.values_list("pet_id", flat=True))
+        self.assertTrue(adopted)
+        unavailable = set(
+            Pet.objects.filter(pk__in=self.pet_ids, availability=False).values_list(
+                "pk", flat=True
+            )
+        )
+        self.assertEqual(unavailable, adopted)
+
+        spent = dict(
+            histories.values_list("adopt__user").annotate(total=Sum("price"))
+        )
+        for user in User.objects.filter(pk__in=self.user_ids):
+            self.assertGreaterEqual(user.account_balance, 0)
+            self.assertEqual(user.account_balance, self.balance - spent.get(user.pk, 0))
+
+        self.category.refresh_from_db()
+        self.assertEqual(self.category.pet_count, self.pets)
+        self.assertEqual(self.category.available_pet_count, self.pets - len(adopted))
+
+
+class BulkAdoptionTests(TestCase):
+    price = Decimal("10.00")
+
+    def setUp(self):
+        self.category = Category.objects.create(name="Bulk")
+        self.pets = [
+            Pet.objects.create(
+                name=f"Pet {i}",
+                category=self.category,
+                breed="Mixed",
+                age=1,
+                description="Friendly",
+                availability=True,
+                price=self.price,
+            )
+            for i in range(3)
+        ]
+        self.pet_ids = [pet.pk for pet in self.pets]
+        self.user = User.objects.create_user(
+            email="bulk@example.com", account_balance=Decimal("100.00")
+        )
+
+    def adopt(self, pet_ids, user=None):
+        token = AccessToken.for_user(user or self.user)
+        return self.client.post(
+            reverse("adoptions-bulk"),
+            {"pet_ids": pet_ids},
+            content_type="application/json",
+            HTTP_AUTHORIZATION=f"JWT {token}",
+        )
+
+    def assertNothingAdopted(self, response, balance, available):
+        self.assertEqual(response.status_code, 400)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.account_balance, balance)
+        self.assertFalse(
+            AdoptionHistory.objects.filter(adopt__user=self.user).exists()
+        )
+        self.assertEqual(
+            sorted(
+                Pet.objects.filter(pk__in=self.pet_ids, availability=True).values_list(
+                    "pk", flat=True
+                )
+            ),
+            available,
+        )
+
+    def test_adopts_every_pet(self):
+        response = self.adopt(self.pet_ids)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(
+            sorted(history["pet"]["id"] for history in response.json()),
+            self.pet_ids,
+        )
+
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.account_balance, Decimal("70.00"))
+        self.assertFalse(
+            Pet.objects.filter(pk__in=self.pet_ids, availability=True).exists()
+        )
+        histories = AdoptionHistory.objects.filter(adopt__user=self.user)
+        self.assertEqual(
+            sorted(histories.values_list("pet_id", flat=True)), self.pet_ids
+        )
+        self.assertEqual(histories.aggregate(total=Sum("price"))["total"], 30)
+        self.category.refresh_from_db()
+        self.assertEqual(self.category.available_pet_count, 0)
+
+    def test_unknown_pet_adopts_nothing(self):
+        missing = max(self.pet_ids) + 1
+        response = self.adopt([*self.pet_ids, missing])
+        self.assertEqual(response.json()["missing"], [missing])
+        self.assertNothingAdopted(response, Decimal("100.00"), self.pet_ids)
+
+    def test_adopted_pet_adopts_nothing(self):
+        other = User.objects.create_user(
+            email="first@example.com", account_balance=Decimal("100.00")
+        )
+        adopt_pet(other, self.pet_ids[0])
+
+        response = self.adopt(self.pet_ids)
+        self.assertEqual(response.json()["unavailable"], [self.pet_ids[0]])
+        self.assertNothingAdopted(response, Decimal("100.00"), self.pet_ids[1:])
+
+    def test_insufficient_balance_adopts_nothing(self):
+        User.objects.filter(pk=self.user.pk).update(account_balance=Decimal("25.00"))
+        response = self.adopt(self.pet_ids)
+        self.assertNothingAdopted(response, Decimal("25.00"), self.pet_ids)
+
+
+def gateway_options(base_url, **options):
+    return {
+        **settings.PAYMENT_GATEWAY,
+        "BASE_URL": base_url,
+        "STORE_ID": "test",
+        "STORE_PASSWORD": "test",
+        "RETRY_DELAY": 0,
+        **options,
+    }
+
+
+def closed_port_url():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return f"http://127.0.0.1:{sock.getsockname()[1]}"
+
+
+class PaymentGatewayTests(SimpleTestCase):
+    def setUp(self):
+        self.server = FakeGateway().start()
+        self.addCleanup(self.server.stop)
+
+    def gateway(self, base_url=None, **options):
+        gateway = PaymentGateway(
+            gateway_options(base_url or self.server.url, **options)
+        )
+        self.addCleanup(gateway.close)
+        return gateway
+
+    def test_requires_store_credentials(self):
+        with self.assertRaises(GatewayNotConfigured):
+            PaymentGateway(gateway_options(self.server.url, STORE_PASSWORD=""))
+
+    def test_gateway_errors_are_not_retried(self):
+        # The session may have been created: sending it again could
+        # start a second checkout
+        self.server.failure_rate = 1.0
+        gateway = self.gateway(MAX_ATTEMPTS=3)
+        with self.assertLogs("adoption.gateway", "WARNING"):
+            with self.assertRaises(GatewayError):
+                asyncio.run(gateway.call(SESSION_PATH, {"store_id": "test"}))
+        self.assertEqual(self.server.requests, 1)
+
+    def test_connection_failures_are_retried(self):
+        gateway = self.gateway(closed_port_url(), MAX_ATTEMPTS=3)
+        with mock.patch.object(gateway, "post", wraps=gateway.post) as post:
+            with self.assertLogs("adoption.gateway", "WARNING"):
+                with self.assertRaises(GatewayError) as raised:
+                    asyncio.run(gateway.call(SESSION_PATH, {}))
+        self.assertTrue(raised.exception.retryable)
+        self.assertEqual(post.call_count, 3)
+
+    def test_abandoned_probe_releases_the_breaker(self):
+        gateway = self.gateway(FAILURE_THRESHOLD=1, RESET_TIMEOUT=0)
+        with self.assertLogs("adoption.gateway", "WARNING"):
+            gateway.breaker.failed()
+        with mock.patch.object(gateway, "post", side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                asyncio.run(gateway.call(SESSION_PATH, {}))
+        self.assertFalse(gateway.breaker.probing)
+        result = asyncio.run(
+            gateway.call(SESSION_PATH, {"store_id": "test", "total_amount": 10})
+        )
+        self.assertEqual(result["status"], "SUCCESS")
+        self.assertIsNone(gateway.breaker.opened_at)
+
+
+class InitiatePaymentTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="payer@example.com")
+        self.addCleanup(reset_gateway)
+        reset_gateway()
+
+    def initiate(self, **headers):
+        return self.client.post(
+            reverse("initiate-payment"),
+            {"amount": 10, "adoptionId": 1},
+            content_type="application/json",
+            **headers,
+        )
+
+    def test_unconfigured_gateway_answers_503(self):
+        gateway = gateway_options("http://127.0.0.1:9", STORE_ID="")
+        token = AccessToken.for_user(self.user)
+        with override_settings(PAYMENT_GATEWAY=gateway):
+            response = self.initiate(HTTP_AUTHORIZATION=f"JWT {token}")
+        self.assertEqual(response.status_code, 503)
+
+    def test_authentication_errors_are_not_wrapped(self):
+        response = self.initiate(HTTP_AUTHORIZATION="JWT not-a-token")
+        self.assertEqual(response.status_code, 401)
+        body = response.json()
+        self.assertIsInstance(body["detail"], str)
+        self.assertEqual(body["code"], "token_not_valid")
@@ -1,8 +1,13 @@
-from rest_framework import viewsets, permissions
+import json
+import math
+
+from asgiref.sync import sync_to_async
+from rest_framework import exceptions, viewsets, permissions
 from rest_framework.views import APIView
 from adoption.models import AdoptionHistory, Payment
 from adoption.serializers import (
     AdoptionHistorySerializer,
+    BulkAdoptionSerializer,
     CreateAdoptionSerializer,
     PaymentSerializer,
 )
@@ -10,24 +15,35 @@ from drf_yasg.utils import swagger_auto_schema
 from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from rest_framework.decorators import api_view
-from sslcommerz_lib import SSLCOMMERZ
+from rest_framework.decorators import action, api_view
+from rest_framework.settings import api_settings
 from django.conf import settings as main_settings
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
 from django.shortcuts import HttpResponseRedirect, redirect
+from django.db.models import prefetch_related_objects
+from api.fast import FastListMixin
+from api.timing import TimedSerializationMixin
 
 
-class AdoptionHistoryViewSet(viewsets.ModelViewSet):
+# Not a FastListMixin: check_fast_serializers measured at most 1.07x, as the
+# few rows per user are dominated by the queries
+class AdoptionHistoryViewSet(TimedSerializationMixin, viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
         if getattr(self, "swagger_fake_view", False):
             return AdoptionHistory.objects.none()
 
-        return AdoptionHistory.objects.filter(
-            adopt__user=self.request.user
-        ).select_related("pet")
+        serializer = None
+        if self.action in ("list", "retrieve"):
+            serializer = self.get_serializer()
+        return AdoptionHistory.objects.for_user(self.request.user, serializer)
 
     def get_serializer_class(self):
+        if self.action == "bulk":
+            return BulkAdoptionSerializer
         if self.request.method == "POST":
             return CreateAdoptionSerializer
         return AdoptionHistorySerializer
@@ -55,18 +71,70 @@ class AdoptionHistoryViewSet(viewsets.ModelViewSet):
         response_serializer = AdoptionHistorySerializer(adoption_history)
         return Response(response_serializer.data, status=status.HTTP_201_CREATED)
 
+    @swagger_auto_schema(
+        operation_summary="Adopt several pets at once",
+        operation_description=(
+            "Adopts every pet in pet_ids in one transaction. If any pet is missing "
+            "or unavailable nothing is adopted and the offending ids are returned"
+        ),
+        request_body=BulkAdoptionSerializer,
+        responses={201: AdoptionHistorySerializer(many=True), 400: "Bad Request"},
+    )
+    @action(detail=False, methods=["post"])
+    def bulk(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        adoption_histories = serializer.save()
+
+        prefetch_related_objects(
+            [history.pet for history in adoption_histories], "images"
+        )
+        response_serializer = AdoptionHistorySerializer(adoption_histories, many=True)
+        return Response(response_serializer.data, status=status.HTTP_201_CREATED)
+
+
+def authenticate(request):
+    """The user of the request as the DRF authentication classes see it"""
+    for authentication in api_settings.DEFAULT_AUTHENTICATION_CLASSES:
+        result = authentication().authenticate(request)
+        if result is not None:
+            return result[0]
+    return None
+
+
+@csrf_exempt
+@require_POST
+async def initiate_payment(request):
+    """
+    Start an SSLCOMMERZ checkout for an adoption. Async so that, served
+    through fur_nest.asgi, a worker keeps handling other requests while
+    the gateway answers.
+    """
+    try:
+        user = await sync_to_async(authenticate)(request)
+    except exceptions.APIException as error:
+        # Same body as DRF's exception handler gives the other endpoints
+        detail = error.detail
+        if not isinstance(detail, (list, dict)):
+            detail = {"detail": detail}
+        return JsonResponse(detail, status=error.status_code, safe=False)
+    if user is None:
+        return JsonResponse(
+            {"detail": "Authentication credentials were not provided."},
+            status=status.HTTP_401_UNAUTHORIZED,
+        )
+    if request.content_type == "application/json":
+        try:
+            data = json.loads(request.body or b"{}")
+        except ValueError:
+            return JsonResponse(
+                {"error": "Invalid JSON"}, status=status.HTTP_400_BAD_REQUEST
+            )
+    else:
+        data = request.POST
+    amount = data.get("amount")
+    adoption_id = data.get("adoptionId")
 
-@api_view(["POST"])
-def initiate_payment(request):
-    user = request.user
-    amount = request.data.get("amount")
-    adoption_id = request.data.get("adoptionId")
-    settings = {
-        "store_id": "furne68ea8e6be6f18",
-        "store_pass": "furne68ea8e6be6f18@ssl",
-        "issandbox": True,
-    }
-    sslcz = SSLCOMMERZ(settings)
     post_body = {}
     post_body["total_amount"] = amount
     post_body["currency"] = "BDT"
@@ -88,11 +156,36 @@ def initiate_payment(request):
     post_body["product_category"] = "Test Category"
     post_body["product_profile"] = "general"
 
-    response = sslcz.createSession(post_body)  # API response
+    # Imported here so that requests isn't loaded on cold starts
+    from adoption.gateway import (
+        GatewayError,
+        GatewayNotConfigured,
+        GatewayUnavailable,
+        get_gateway,
+    )
+
+    try:
+        response = await get_gateway().create_session(post_body)
+    except GatewayNotConfigured:
+        return JsonResponse(
+            {"error": "Payments are not configured"},
+            status=status.HTTP_503_SERVICE_UNAVAILABLE,
+        )
+    except GatewayUnavailable as error:
+        response = JsonResponse(
+            {"error": "Payment gateway unavailable"},
+            status=status.HTTP_503_SERVICE_UNAVAILABLE,
+        )
+        response["Retry-After"] = str(math.ceil(error.retry_after) or 1)
+        return response
+    except GatewayError:
+        return JsonResponse(
+            {"error": "Payment gateway error"}, status=status.HTTP_502_BAD_GATEWAY
+        )
 
     if response.get("status") == "SUCCESS":
-        return Response({"payment_url": response["GatewayPageURL"]})
-    return Response(
+        return JsonResponse({"payment_url": response["GatewayPageURL"]})
+    return JsonResponse(
         {"error": "Payment initiation failed"}, status=status.HTTP_400_BAD_REQUEST
     )
 
@@ -124,12 +217,18 @@ def payment_success(request):
         return Response({"error": str(e)}, status=500)
 
 
-class PaymentHistory(viewsets.generics.ListAPIView):
+class PaymentHistory(
+    FastListMixin, TimedSerializationMixin, viewsets.generics.ListAPIView
+):
     serializer_class = PaymentSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        return Payment.objects.filter(user=self.request.user).order_by("-created_at")
+        return (
+            Payment.objects.filter(user=self.request.user)
+            .select_related("adoption__pet")
+            .order_by("-created_at")
+        )
 
 
 class HasAdoptedPet(APIView):
@@ -0,0 +1,207 @@
+import math
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.test.utils import (
+    CaptureQueriesContext,
+    setup_test_environment,
+    teardown_test_environment,
+)
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+Endpoint = namedtuple("Endpoint", ["name", "url", "authenticated"])
+Measurement = namedtuple(
+    "Measurement", ["status", "queries", "seconds", "bytes", "response"]
+)
+
+# How to build URLs for every basename registered on the routers in
+# api/urls.py: (url kwargs, detail pk, needs authentication). Each callable
+# gets the dict of sample objects picked by the caller.
+ROUTES = {
+    "pets": (lambda s: {}, lambda s: s["pet"].pk, False),
+    "category": (lambda s: {}, lambda s: s["category"].pk, False),
+    "adoptions": (lambda s: {}, lambda s: s["adoption"].pk, True),
+    "balance": (lambda s: {}, lambda s: s["user"].pk, True),
+    "pet-review": (
+        lambda s: {"pet_pk": s["pet"].pk},
+        lambda s: s["review"].pk,
+        False,
+    ),
+    "pet-images": (
+        lambda s: {"pet_pk": s["pet"].pk},
+        lambda s: s["image"].pk,
+        False,
+    ),
+}
+
+# Plain paths from api/urls.py that are not behind a router.
+EXTRA_ROUTES = {
+    "user-me": (lambda s: {}, True),
+    "payment-history": (lambda s: {}, True),
+    "has-adopted": (lambda s: {"pet_id": s["pet"].pk}, True),
+}
+
+
+def discover_endpoints(samples):
+    """
+    Return a GET endpoint for the list and detail route of every viewset
+    registered in api/urls.py, plus the read-only plain paths. A viewset
+    registered without an entry in ROUTES is an error, so new routes can't
+    silently escape the budgets.
+    """
+    from api import urls
+
+    endpoints = []
+    for router in (urls.router, urls.pet_router):
+        for prefix, viewset, basename in router.registry:
+            if basename not in ROUTES:
+                raise ImproperlyConfigured(
+                    f"No benchmark route for router basename {basename!r}"
+                )
+            url_kwargs, detail_pk, authenticated = ROUTES[basename]
+            kwargs = url_kwargs(samples)
+            endpoints.append(
+                Endpoint(
+                    f"{basename}-list",
+                    reverse(f"{basename}-list", kwargs=kwargs),
+                    authenticated,
+                )
+            )
+            detail_kwargs = {**kwargs, "pk": detail_pk(samples)}
+            endpoints.append(
+                Endpoint(
+                    f"{basename}-detail",
+                    reverse(f"{basename}-detail", kwargs=detail_kwargs),
+                    authenticated,
+                )
+            )
+    for name, (url_kwargs, authenticated) in EXTRA_ROUTES.items():
+        endpoints.append(
+            Endpoint(name, reverse(name, kwargs=url_kwargs(samples)), authenticated)
+        )
+    return endpoints
+
+
+def seed_samples(scale=1):
+    """
+    Load the fixture plus a generated dataset proportional to ``scale`` and
+    return the sample objects ROUTES builds URLs from.
+    """
+    from adoption.models import Payment
+    from api import datagen
+    from pet.models import PetImage, Review
+
+    datagen.load_fixture()
+    created = datagen.generate(
+        pets=50 * scale,
+        users=10 * scale,
+        images_per_pet=2,
+        reviews=100 * scale,
+        adoptions=20 * scale,
+        payments=10 * scale,
+        seed=0,
+    )
+    payment = Payment.objects.select_related("adoption__adopt__user").get(
+        pk=created["payments"][0]
+    )
+    review = Review.objects.select_related("pet__category").get(
+        pk=created["reviews"][0]
+    )
+    pet = review.pet
+    return {
+        "user": payment.adoption.adopt.user,
+        "adoption": payment.adoption,
+        "pet": pet,
+        "category": pet.category,
+        "review": review,
+        "image": PetImage.objects.filter(pet=pet).first()
+        or PetImage.objects.create(pet=pet, image="fur-nest/sample.jpg"),
+    }
+
+
+def grow_samples(samples, n):
+    """Make every list behind the sampled endpoints longer by ``n`` rows"""
+    from adoption.models import AdoptionHistory, Payment
+    from api import datagen
+    from pet.models import Pet, PetImage, Review
+
+    created = datagen.generate(pets=n, users=n, seed=1)
+    pet, user = samples["pet"], samples["user"]
+    Review.objects.bulk_create(
+        Review(pet=pet, user_id=reviewer_id, ratings=5, comment="more")
+        for reviewer_id in created["users"]
+    )
+    PetImage.objects.bulk_create(
+        PetImage(pet=pet, image=f"fur-nest/more-{i}.jpg") for i in range(n)
+    )
+    adopt = samples["adoption"].adopt
+    histories = AdoptionHistory.objects.bulk_create(
+        AdoptionHistory(adopt=adopt, pet=new_pet, price=new_pet.price)
+        for new_pet in Pet.objects.filter(pk__in=created["pets"])
+    )
+    Payment.objects.bulk_create(
+        Payment(
+            user=user,
+            adoption=history,
+            amount=history.price,
+            transaction_id=f"txn_more_{history.pk}",
+        )
+        for history in histories
+    )
+
+
+def api_client(user=None):
+    """APIClient sending a real JWT so authentication cost is included"""
+    if user is None:
+        return APIClient()
+    return APIClient(HTTP_AUTHORIZATION=f"JWT {AccessToken.for_user(user)}")
+
+
+def measure(client, url, before_request=None, method="get", data=None):
+    """Run one request and return its Measurement"""
+    if before_request is not None:
+        before_request()
+    with CaptureQueriesContext(connection) as queries:
+        start = time.perf_counter()
+        response = getattr(client, method)(url, data, format="json")
+        elapsed = time.perf_counter() - start
+    return Measurement(
+        response.status_code, len(queries), elapsed, len(response.content), response
+    )
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize(seconds):
+    """p50/p95/p99 and mean of a list of durations, in milliseconds"""
+    return {
+        "p50": round(percentile(seconds, 50) * 1000, 3),
+        "p95": round(percentile(seconds, 95) * 1000, 3),
+        "p99": round(percentile(seconds, 99) * 1000, 3),
+        "mean": round(sum(seconds) / len(seconds) * 1000, 3) if seconds else 0.0,
+    }
+
+
+@contextmanager
+def throwaway_database(verbosity=0):
+    """Run the block against a freshly created test database"""
+    setup_test_environment()
+    old_name = connection.settings_dict["NAME"]
+    connection.creation.create_test_db(verbosity=verbosity, autoclobber=True)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=verbosity)
+        teardown_test_environment()
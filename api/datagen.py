@@ -0,0 +1,245 @@
+import itertools
+import random
+import uuid
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.db.models.functions import Now
+from adoption.models import Adopt, AdoptionHistory, Payment
+from pet.counts import reconcile_category_counts
+from pet.images import set_image_urls
+from pet.models import Category, Pet, PetImage, Review
+from pet.ratings import reconcile_ratings
+from pet.search import update_search_vectors
+from users.models import User
+
+FIXTURE = settings.BASE_DIR / "fixtures" / "pet_data.json"
+
+BREEDS = [
+    "Golden Retriever",
+    "German Shepherd",
+    "Siamese Cat",
+    "Persian Cat",
+    "Budgerigar",
+    "Holland Lop",
+    "Betta",
+    "Syrian Hamster",
+]
+NAMES = ["Buddy", "Max", "Luna", "Bella", "Rocky", "Milo", "Coco", "Daisy", "Oreo"]
+WORDS = "playful loyal calm friendly curious gentle vocal quiet smart energetic".split()
+
+
+def load_fixture():
+    """Load the categories and pets of fixtures/pet_data.json"""
+    call_command("loaddata", str(FIXTURE), verbosity=0)
+
+
+def _batches(items, size=1000):
+    iterator = iter(items)
+    while True:
+        batch = list(itertools.islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def _create(model, rows, batch_size):
+    """bulk_create ``rows`` one batch at a time and return the new pks"""
+    pks = []
+    for batch in _batches(rows, batch_size):
+        pks.extend(obj.pk for obj in model.objects.bulk_create(batch))
+    return pks
+
+
+def _pet_image(pet_id, image):
+    # bulk_create() skips the post_save signal that stores the URLs
+    pet_image = PetImage(pet_id=pet_id, image=image)
+    set_image_urls(pet_image)
+    return pet_image
+
+
+def _picker(rng, population, skew):
+    """
+    Return a function drawing from ``population``. With ``skew`` > 0 the
+    draw follows a Zipf-like distribution where the first items are the
+    most popular; 0 is uniform.
+    """
+    if not skew:
+        return lambda: rng.choice(population)
+    cum_weights = list(
+        itertools.accumulate(1 / rank**skew for rank in range(1, len(population) + 1))
+    )
+    return lambda: rng.choices(population, cum_weights=cum_weights)[0]
+
+
+def _price(rng, distribution, mean):
+    if distribution == "lognormal":
+        # exp(sigma**2 / 2) ~= 1.32 for sigma 0.75, so the mean stays ``mean``
+        value = rng.lognormvariate(0, 0.75) * mean / 1.32
+    else:
+        value = rng.uniform(0, 2 * mean)
+    return Decimal(min(value, 99999999)).quantize(Decimal("0.01"))
+
+
+def generate(
+    categories=0,
+    pets=0,
+    users=0,
+    images_per_pet=0,
+    reviews=0,
+    adoptions=0,
+    payments=0,
+    category_skew=0.0,
+    review_skew=0.0,
+    price_distribution="uniform",
+    price_mean=500,
+    seed=None,
+    batch_size=1000,
+):
+    """
+    Bulk-insert a synthetic dataset and return the new primary keys by kind.
+
+    Rows are generated and written one batch at a time so millions of pets
+    fit in memory. Pets go into the new categories (or the existing ones
+    when none are requested) following ``category_skew``, reviews target
+    pets following ``review_skew`` and adoptions pick random available
+    pets. The search vectors, rating aggregates and category counts are
+    rebuilt at the end since ``bulk_create`` skips the signals that maintain
+    them.
+    """
+    rng = random.Random(seed)
+    tag = uuid.uuid4().hex[:8]
+    created = {}
+
+    created["categories"] = _create(
+        Category,
+        (
+            Category(name=f"Category {tag}-{i}", description="Generated category")
+            for i in range(categories)
+        ),
+        batch_size,
+    )
+    category_ids = created["categories"] or list(
+        Category.objects.values_list("pk", flat=True)
+    )
+    pick_category = _picker(rng, category_ids, category_skew)
+
+    created["pets"] = _create(
+        Pet,
+        (
+            Pet(
+                name=rng.choice(NAMES),
+                category_id=pick_category(),
+                breed=rng.choice(BREEDS),
+                age=rng.randint(0, 15),
+                description=" ".join(rng.choices(WORDS, k=12)),
+                availability=True,
+                price=_price(rng, price_distribution, price_mean),
+            )
+            for _ in range(pets)
+        ),
+        batch_size,
+    )
+    pet_ids = created["pets"] or list(Pet.objects.values_list("pk", flat=True))
+
+    password = make_password(None)
+    created["users"] = _create(
+        User,
+        (
+            User(
+                email=f"user-{tag}-{i}@example.com",
+                password=password,
+                first_name=rng.choice(NAMES),
+                last_name="Generated",
+                account_balance=Decimal(rng.randint(0, 1000000)) / 100,
+            )
+            for i in range(users)
+        ),
+        batch_size,
+    )
+    user_ids = created["users"] or list(User.objects.values_list("pk", flat=True))
+
+    created["images"] = _create(
+        PetImage,
+        (
+            _pet_image(pet_id, f"fur-nest/generated/{tag}-{pet_id}-{n}.jpg")
+            for pet_id in created["pets"]
+            for n in range(images_per_pet)
+        ),
+        batch_size,
+    )
+
+    pick_reviewed_pet = _picker(rng, pet_ids, review_skew)
+    reviewed = set()
+
+    def review_rows():
+        for _ in range(reviews):
+            pet_id = pick_reviewed_pet()
+            reviewed.add(pet_id)
+            yield Review(
+                pet_id=pet_id,
+                user_id=rng.choice(user_ids),
+                ratings=rng.randint(1, 5),
+                comment=" ".join(rng.choices(WORDS, k=8)),
+            )
+
+    created["reviews"] = _create(Review, review_rows(), batch_size)
+
+    if created["pets"]:
+        available = pet_ids
+    else:
+        available = list(
+            Pet.objects.filter(availability=True).values_list("pk", flat=True)
+        )
+    adopted = rng.sample(available, min(adoptions, len(available)))
+    adopt_ids = {
+        user_id: uuid.uuid4() for user_id in {rng.choice(user_ids) for _ in adopted}
+    }
+    Adopt.objects.bulk_create(
+        (Adopt(id=pk, user_id=user_id) for user_id, pk in adopt_ids.items()),
+        batch_size=batch_size,
+    )
+    adopt_users = list(adopt_ids)
+
+    created["adoptions"] = []
+    paid = []
+    for batch in _batches(adopted, batch_size):
+        prices = dict(Pet.objects.filter(pk__in=batch).values_list("pk", "price"))
+        rows = [
+            AdoptionHistory(
+                adopt_id=adopt_ids[rng.choice(adopt_users)],
+                pet_id=pet_id,
+                price=prices[pet_id],
+            )
+            for pet_id in batch
+        ]
+        for history in AdoptionHistory.objects.bulk_create(rows):
+            created["adoptions"].append(history.pk)
+            if len(paid) < payments:
+                paid.append(history)
+        Pet.objects.filter(pk__in=batch).update(availability=False, updated_at=Now())
+
+    adopt_owners = {adopt_id: user_id for user_id, adopt_id in adopt_ids.items()}
+    created["payments"] = _create(
+        Payment,
+        (
+            Payment(
+                user_id=adopt_owners[history.adopt_id],
+                adoption_id=history.pk,
+                amount=history.price,
+                transaction_id=f"txn_{tag}_{history.pk}",
+            )
+            for history in paid
+        ),
+        batch_size,
+    )
+
+    for batch in _batches(created["pets"], batch_size):
+        update_search_vectors(Pet.objects.filter(pk__in=batch))
+    for batch in _batches(sorted(reviewed), batch_size):
+        reconcile_ratings(batch)
+    for batch in _batches(category_ids, batch_size):
+        reconcile_category_counts(batch)
+    return created
@@ -0,0 +1,159 @@
+import time
+from contextlib import contextmanager
+from io import BytesIO
+from wsgiref.util import setup_testing_defaults
+
+from django.core.exceptions import ImproperlyConfigured
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import AccessToken
+from api.benchmarks import seed_samples, summarize, throwaway_database
+from pet.cache import get_catalog_cache
+
+# Connection settings compared, applied on top of the configured database
+MODES = {
+    "no-reuse": {"CONN_MAX_AGE": 0},
+    "persistent": {"CONN_MAX_AGE": 600, "CONN_HEALTH_CHECKS": True},
+    "pool": {"CONN_MAX_AGE": 0, "POOL": {"min_size": 1, "max_size": 4}},
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure request latency through the WSGI handler with a new database "
+        "connection per request, persistent connections and a connection pool"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=200)
+        parser.add_argument("--warmup", type=int, default=10)
+        parser.add_argument(
+            "--mode", action="append", dest="modes", choices=list(MODES)
+        )
+        parser.add_argument(
+            "--connect-latency",
+            type=float,
+            default=0.0,
+            help="Milliseconds added to every new connection, standing in for "
+            "the TCP+TLS+auth handshake to a remote database",
+        )
+
+    def handle(self, *args, **options):
+        with throwaway_database():
+            samples = seed_samples()
+            token = AccessToken.for_user(samples["user"])
+            paths = [
+                (reverse("pets-detail", args=[samples["pet"].pk]), None),
+                (
+                    reverse("has-adopted", args=[samples["pet"].pk]),
+                    f"JWT {token}",
+                ),
+            ]
+            results = {}
+            for mode in options["modes"] or list(MODES):
+                try:
+                    with connection_settings(**MODES[mode]):
+                        results[mode] = self.run(paths, options)
+                except ImproperlyConfigured as error:
+                    self.stderr.write(f"{mode}: skipped ({error})")
+
+        self.stdout.write(
+            f"{'mode':<12} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} "
+            f"{'connects/req':>12} {'connect ms':>10}"
+        )
+        for mode, result in results.items():
+            self.stdout.write(
+                f"{mode:<12} {result['throughput']:>9} "
+                f"{result['latency']['p50']:>8} {result['latency']['p95']:>8} "
+                f"{result['connects']:>12} {result['connect_ms']:>10}"
+            )
+
+    def run(self, paths, options):
+        handler = WSGIHandler()
+        cache = get_catalog_cache()
+        connects = []
+        latency = options["connect_latency"] / 1000
+
+        def connected(sender, connection, **kwargs):
+            start = time.perf_counter()
+            if latency:
+                time.sleep(latency)
+            connects.append(time.perf_counter() - start)
+
+        seconds = []
+        connection_created.connect(connected)
+        try:
+            for i in range(options["warmup"] + options["requests"]):
+                path, authorization = paths[i % len(paths)]
+                cache.clear()
+                if i == options["warmup"]:
+                    connects.clear()
+                start = time.perf_counter()
+                status = request(handler, path, authorization)
+                elapsed = time.perf_counter() - start
+                if not status.startswith("200"):
+                    raise CommandError(f"{path} returned {status}")
+                if i >= options["warmup"]:
+                    seconds.append(elapsed)
+        finally:
+            connection_created.disconnect(connected)
+
+        return {
+            "throughput": round(len(seconds) / sum(seconds), 1),
+            "latency": summarize(seconds),
+            "connects": round(len(connects) / len(seconds), 2),
+            "connect_ms": summarize(connects)["mean"] if connects else 0.0,
+        }
+
+
+def request(handler, path, authorization=None):
+    """
+    GET ``path`` through the WSGI handler like a server would, so that
+    request_started/request_finished close or keep the connection as
+    configured (the test client skips that). Returns the status line.
+    """
+    environ = {"PATH_INFO": path, "HTTP_HOST": "testserver"}
+    if authorization:
+        environ["HTTP_AUTHORIZATION"] = authorization
+    setup_testing_defaults(environ)
+    environ["wsgi.input"] = BytesIO()
+    statuses = []
+    response = handler(environ, lambda status, headers: statuses.append(status))
+    for _ in response:
+        pass
+    response.close()
+    return statuses[0]
+
+
+@contextmanager
+def connection_settings(CONN_MAX_AGE, CONN_HEALTH_CHECKS=False, POOL=None):
+    """Reconnect the default database with other connection settings"""
+    settings_dict = connection.settings_dict
+    saved = {
+        "CONN_MAX_AGE": settings_dict["CONN_MAX_AGE"],
+        "CONN_HEALTH_CHECKS": settings_dict["CONN_HEALTH_CHECKS"],
+        "OPTIONS": settings_dict["OPTIONS"],
+    }
+    connection.close()
+    settings_dict["CONN_MAX_AGE"] = CONN_MAX_AGE
+    settings_dict["CONN_HEALTH_CHECKS"] = CONN_HEALTH_CHECKS
+    settings_dict["OPTIONS"] = {**saved["OPTIONS"]}
+    if POOL is not None:
+        if connection.vendor != "postgresql":
+            settings_dict.update(saved)
+            raise ImproperlyConfigured("connection pools need PostgreSQL")
+        settings_dict["OPTIONS"]["pool"] = POOL
+    try:
+        # Fails early when the pool is unavailable (psycopg 2)
+        connection.ensure_connection()
+        yield
+    finally:
+        connection.close()
+        try:
+            if POOL is not None:
+                connection.close_pool()
+        finally:
+            settings_dict.update(saved)
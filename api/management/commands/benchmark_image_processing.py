@@ -0,0 +1,84 @@
+import io
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from PIL import Image, ImageFilter
+from pet.processing import process_image
+
+
+def phone_photo(width, height, seed):
+    """A JPEG with camera-like noise and EXIF, sized like a phone photo"""
+    rng = random.Random(seed)
+    image = Image.effect_noise((width // 4, height // 4), 64).convert("RGB")
+    image = image.resize((width, height)).filter(ImageFilter.GaussianBlur(2))
+    image.paste(
+        (rng.randrange(256), rng.randrange(256), rng.randrange(256)),
+        (0, 0, width // 3, height // 3),
+    )
+    exif = Image.Exif()
+    exif[0x010F] = "Phone"
+    exif[0x0112] = 6
+    output = io.BytesIO()
+    image.save(output, "JPEG", quality=95, exif=exif.tobytes())
+    return output.getvalue()
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure the throughput of pet.processing on synthetic phone photos, "
+        "in one process and in a pool of --workers processes"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--images", type=int, default=24)
+        parser.add_argument("--width", type=int, default=4032)
+        parser.add_argument("--height", type=int, default=3024)
+        parser.add_argument("--workers", type=int, default=os.cpu_count())
+        parser.add_argument("--format", default=None, choices=["WEBP", "JPEG"])
+        parser.add_argument("--quality", type=int, default=None)
+
+    def handle(self, *args, **options):
+        processing = settings.PET_IMAGE_PROCESSING
+        arguments = (
+            processing["MAX_DIMENSION"],
+            options["format"] or processing["FORMAT"],
+            options["quality"] or processing["QUALITY"],
+            processing["MAX_PIXELS"],
+        )
+        photos = [
+            phone_photo(options["width"], options["height"], seed)
+            for seed in range(options["images"])
+        ]
+        self.stdout.write(
+            f"{len(photos)} photos of {options['width']}x{options['height']}, "
+            f"{sum(map(len, photos)) // len(photos) // 1024} KiB on average, "
+            f"to {arguments[1]} q{arguments[2]} within {arguments[0]}px"
+        )
+
+        self.stdout.write(
+            f"{'workers':>7} {'seconds':>8} {'img/s':>7} {'img/s/core':>10}"
+        )
+        outputs = None
+        for workers in sorted({1, options["workers"]}):
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                # Start the workers before timing
+                list(pool.map(abs, range(workers)))
+                start = time.perf_counter()
+                columns = [[argument] * len(photos) for argument in arguments]
+                outputs = list(pool.map(process_image, photos, *columns))
+                seconds = time.perf_counter() - start
+            throughput = len(photos) / seconds
+            self.stdout.write(
+                f"{workers:>7} {seconds:>8.2f} {throughput:>7.1f} "
+                f"{throughput / workers:>10.1f}"
+            )
+
+        self.stdout.write(
+            f"Output: {sum(map(len, outputs)) // len(outputs) // 1024} KiB on "
+            f"average ({sum(map(len, outputs)) / sum(map(len, photos)):.1%} of the "
+            "input)"
+        )
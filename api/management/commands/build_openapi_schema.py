@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand, CommandError
+from fur_nest.schema import (
+    artifact_name,
+    generate_schema,
+    get_artifact_name,
+    write_artifact,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate the OpenAPI schema into a content-hashed static file served "
+        "by whitenoise, which /swagger/ and /redoc/ then load instead of "
+        "generating the schema per request. Run it with the production "
+        "database engine, which sets the bounds of integer fields"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Fail if the prebuilt schema is missing or out of date, "
+            "without writing it",
+        )
+
+    def handle(self, *args, **options):
+        content = generate_schema()
+        name = artifact_name(content)
+        current = get_artifact_name()
+        if options["check"]:
+            if current != name:
+                raise CommandError(
+                    f"The prebuilt schema is {current or 'missing'}, the API "
+                    f"generates {name}: run build_openapi_schema"
+                )
+            self.stdout.write(self.style.SUCCESS(f"{name} is up to date"))
+            return
+        if current == name:
+            self.stdout.write(f"{name} is up to date")
+            return
+        write_artifact(content)
+        self.stdout.write(self.style.SUCCESS(f"Wrote {name} ({len(content)} bytes)"))
@@ -0,0 +1,118 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+from django.urls import reverse
+from api.benchmarks import (
+    api_client,
+    measure,
+    seed_samples,
+    summarize,
+    throwaway_database,
+)
+from pet.cache import get_catalog_cache
+
+# List endpoints served by api.fast.FastListMixin, with the query strings
+# to compare. ROUTE kwargs come from the seeded samples.
+FAST_ENDPOINTS = {
+    "pets-list": (
+        lambda s: {},
+        False,
+        [
+            "",
+            "?page=2",
+            "?fields=id,name,price,images",
+            "?omit=description,images",
+            "?cursor=",
+            "?cursor=&ordering=price",
+            "?cursor=&ordering=-rating_avg&fields=id,name",
+            "?search=retriever",
+            "?cursor=&search=retriever",
+            "?availability=true&ordering=price",
+        ],
+    ),
+    "pet-review-list": (lambda s: {"pet_pk": s["pet"].pk}, False, [""]),
+    "payment-history": (lambda s: {}, True, [""]),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway database and check that the fast list serializers "
+        "return byte-identical responses to the DRF serializers, then compare "
+        "their latency"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--scale", type=int, default=4)
+        parser.add_argument("--repeat", type=int, default=30)
+
+    def handle(self, *args, **options):
+        with throwaway_database():
+            samples = seed_samples(options["scale"])
+            clients = {False: api_client(), True: api_client(samples["user"])}
+            urls = self.urls(samples)
+            failures = self.compare(clients, urls)
+            timings = self.time(clients, urls, options["repeat"])
+
+        self.stdout.write(
+            f"{'url':<60} {'drf p50':>9} {'fast p50':>9} {'speedup':>8}"
+        )
+        for name, authenticated, url in urls:
+            slow, fast = timings[False][url]["p50"], timings[True][url]["p50"]
+            speedup = round(slow / fast, 2) if fast else 0
+            self.stdout.write(f"{url:<60} {slow:>9} {fast:>9} {speedup:>7}x")
+
+        if failures:
+            raise CommandError("\n".join(failures))
+        self.stdout.write(self.style.SUCCESS("Fast responses are byte-identical"))
+
+    def urls(self, samples):
+        urls = []
+        for name, (url_kwargs, authenticated, query_strings) in FAST_ENDPOINTS.items():
+            url = reverse(name, kwargs=url_kwargs(samples))
+            urls.extend((name, authenticated, url + query) for query in query_strings)
+        return urls
+
+    def fetch(self, client, url, fast):
+        get_catalog_cache().clear()
+        with override_settings(FAST_SERIALIZERS=fast):
+            return client.get(url)
+
+    def compare(self, clients, urls):
+        failures = []
+        for name, authenticated, url in urls:
+            client = clients[authenticated]
+            expected = self.fetch(client, url, fast=False)
+            actual = self.fetch(client, url, fast=True)
+            if expected.status_code != 200:
+                failures.append(f"{url} returned {expected.status_code}")
+            elif actual.content != expected.content:
+                failures.append(
+                    f"{url} differs\n  drf:  {expected.content[:300]!r}\n"
+                    f"  fast: {actual.content[:300]!r}"
+                )
+            # Follow one cursor page to cover cursors encoded from values() rows
+            next_url = expected.json().get("next") if "cursor=" in url else None
+            if next_url and not failures:
+                failures.extend(
+                    self.compare(clients, [(name, authenticated, next_url)])
+                )
+        return failures
+
+    def time(self, clients, urls, repeat):
+        """
+        p50/p95/p99 per URL with each path. The paths take turns so that
+        both see the same load on the machine.
+        """
+        cache = get_catalog_cache()
+        seconds = {False: {}, True: {}}
+        for name, authenticated, url in urls:
+            client = clients[authenticated]
+            for _ in range(repeat):
+                for fast in (False, True):
+                    with override_settings(FAST_SERIALIZERS=fast):
+                        measurement = measure(client, url, cache.clear)
+                    seconds[fast].setdefault(url, []).append(measurement.seconds)
+        return {
+            fast: {url: summarize(samples) for url, samples in by_url.items()}
+            for fast, by_url in seconds.items()
+        }
@@ -0,0 +1,116 @@
+import os
+import re
+import subprocess
+import sys
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# What a cold start may cost: importing the WSGI module and the URLconf in a
+# fresh interpreter (fastest of a few runs), measured at about 450 ms and
+# 1072 modules here. Override them for slower CI machines or when a
+# dependency upgrade legitimately moves the numbers.
+IMPORT_TIME_BUDGET_MS = float(os.environ.get("IMPORT_TIME_BUDGET_MS", 900))
+MODULE_BUDGET = int(os.environ.get("IMPORT_MODULE_BUDGET", 1250))
+
+# Modules that must only be imported on first use
+LAZY_MODULES = [
+    "adoption.gateway",
+    "anymail",
+    "debug_toolbar",
+    "drf_yasg.generators",
+    "drf_yasg.views",
+]
+
+COLD_START = """
+import sys, time
+start = time.perf_counter()
+import {module}
+from django.urls import get_resolver
+get_resolver().url_patterns
+print(time.perf_counter() - start)
+print(" ".join(sorted(sys.modules)))
+"""
+
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+\d+ \|\s*(\S+)")
+
+
+def cold_start(module):
+    """
+    Import ``module`` and the URLconf in a fresh interpreter under
+    ``python -X importtime``. Return the import time in seconds, the loaded
+    module names and the self time per top-level package in microseconds.
+    """
+    env = {**os.environ, "PYTHONDONTWRITEBYTECODE": "1"}
+    env.setdefault("DJANGO_SETTINGS_MODULE", settings.SETTINGS_MODULE)
+    code = COLD_START.format(module=module)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        cwd=settings.BASE_DIR,
+        env=env,
+    )
+    if result.returncode:
+        raise CommandError(f"Importing {module} failed:\n{result.stderr}")
+    seconds, modules = result.stdout.splitlines()[-2:]
+    packages = Counter()
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            packages[match[2].split(".")[0]] += int(match[1])
+    return float(seconds), set(modules.split()), packages
+
+
+def fastest_cold_start(module, runs=5):
+    """The fastest run is the least disturbed by the rest of the machine"""
+    return min((cold_start(module) for _ in range(runs)), key=lambda run: run[0])
+
+
+def eager_lazy_modules(modules):
+    """LAZY_MODULES found among ``modules``"""
+    lazy = [name for name in LAZY_MODULES if name in modules]
+    if settings.DEBUG and "debug_toolbar" in lazy:
+        lazy.remove("debug_toolbar")
+    return lazy
+
+
+class Command(BaseCommand):
+    help = (
+        "Import the WSGI application and the URLconf in a fresh interpreter "
+        "with python -X importtime and fail if it takes too long, loads too "
+        "many modules or loads modules meant to be lazy"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--runs", type=int, default=5)
+        parser.add_argument("--max-ms", type=float, default=IMPORT_TIME_BUDGET_MS)
+        parser.add_argument("--max-modules", type=int, default=MODULE_BUDGET)
+        parser.add_argument("--top", type=int, default=15)
+
+    def handle(self, *args, **options):
+        module = settings.WSGI_APPLICATION.rsplit(".", 1)[0]
+        seconds, modules, packages = fastest_cold_start(module, options["runs"])
+
+        self.stdout.write(f"{'package':<28} {'self ms':>8}")
+        for package, microseconds in packages.most_common(options["top"]):
+            self.stdout.write(f"{package:<28} {microseconds / 1000:>8.1f}")
+        milliseconds = seconds * 1000
+        self.stdout.write(
+            f"Importing {module} and the URLconf took {milliseconds:.0f} ms "
+            f"(budget {options['max_ms']:.0f}) and loaded {len(modules)} modules "
+            f"(budget {options['max_modules']})"
+        )
+
+        failures = []
+        if milliseconds > options["max_ms"]:
+            failures.append(f"Import took {milliseconds:.0f} ms")
+        if len(modules) > options["max_modules"]:
+            failures.append(f"{len(modules)} modules were loaded")
+        lazy = eager_lazy_modules(modules)
+        if lazy:
+            failures.append(f"Loaded on startup: {', '.join(lazy)}")
+        if failures:
+            raise CommandError("\n".join(failures))
+        self.stdout.write(self.style.SUCCESS("Cold start is within budget"))
@@ -0,0 +1,112 @@
+from django.core.management.base import BaseCommand, CommandError
+from api.benchmarks import (
+    api_client,
+    discover_endpoints,
+    grow_samples,
+    measure,
+    seed_samples,
+    summarize,
+    throwaway_database,
+)
+from pet.cache import get_catalog_cache
+
+# Maximum number of queries per endpoint, authentication included. The
+# count must also stay the same when the underlying lists grow. Cached
+# catalog endpoints include the fingerprint query of pet.cache.
+QUERY_BUDGETS = {
+    "pets-list": 4,
+    "pets-detail": 3,
+    "category-list": 2,
+    "category-detail": 2,
+    "adoptions-list": 3,
+    "adoptions-detail": 3,
+    "balance-list": 5,
+    "balance-detail": 5,
+    "pet-review-list": 2,
+    "pet-review-detail": 2,
+    "pet-images-list": 1,
+    "pet-images-detail": 1,
+    "user-me": 3,
+    "payment-history": 2,
+    "has-adopted": 2,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway database, hit every endpoint in api/urls.py and fail "
+        "if an endpoint exceeds its query budget or its query count grows with "
+        "the size of the data it lists"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--scale", type=int, default=1)
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument(
+            "--warm-cache",
+            action="store_true",
+            help="Keep the catalog cache between requests when timing",
+        )
+
+    def handle(self, *args, **options):
+        with throwaway_database():
+            samples = seed_samples(options["scale"])
+            endpoints = discover_endpoints(samples)
+            small = self.count_queries(endpoints, samples)
+            grow_samples(samples, 25 * options["scale"])
+            large = self.count_queries(endpoints, samples)
+            timings = self.time_endpoints(endpoints, samples, options)
+
+        failures = []
+        self.stdout.write(
+            f"{'endpoint':<20} {'queries':>8} {'budget':>7} "
+            f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}"
+        )
+        for endpoint in endpoints:
+            budget = QUERY_BUDGETS.get(endpoint.name)
+            status, queries = large[endpoint.name]
+            stats = timings[endpoint.name]
+            self.stdout.write(
+                f"{endpoint.name:<20} {queries:>8} {budget if budget else '-':>7} "
+                f"{stats['p50']:>8} {stats['p95']:>8} {stats['p99']:>8}"
+            )
+            if status != 200:
+                failures.append(f"{endpoint.name} returned {status}")
+            if budget is None:
+                failures.append(f"{endpoint.name} has no query budget")
+            elif queries > budget:
+                failures.append(f"{endpoint.name} ran {queries} queries > {budget}")
+            if queries > small[endpoint.name][1]:
+                failures.append(
+                    f"{endpoint.name} grew from {small[endpoint.name][1]} to "
+                    f"{queries} queries with more data"
+                )
+
+        if failures:
+            raise CommandError("\n".join(failures))
+        self.stdout.write(self.style.SUCCESS("All endpoints are within budget"))
+
+    def clients(self, samples):
+        return {False: api_client(), True: api_client(samples["user"])}
+
+    def count_queries(self, endpoints, samples):
+        clients = self.clients(samples)
+        cache = get_catalog_cache()
+        counts = {}
+        for endpoint in endpoints:
+            result = measure(clients[endpoint.authenticated], endpoint.url, cache.clear)
+            counts[endpoint.name] = (result.status, result.queries)
+        return counts
+
+    def time_endpoints(self, endpoints, samples, options):
+        clients = self.clients(samples)
+        cache = get_catalog_cache()
+        before_request = None if options["warm_cache"] else cache.clear
+        timings = {}
+        for endpoint in endpoints:
+            client = clients[endpoint.authenticated]
+            seconds = []
+            for _ in range(options["repeat"]):
+                seconds.append(measure(client, endpoint.url, before_request).seconds)
+            timings[endpoint.name] = summarize(seconds)
+        return timings
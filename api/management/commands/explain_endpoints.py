@@ -0,0 +1,241 @@
+import json
+import re
+
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from api.benchmarks import (
+    Endpoint,
+    api_client,
+    discover_endpoints,
+    seed_samples,
+    throwaway_database,
+)
+from pet.cache import get_catalog_cache
+from pet.filters import PetFilter
+from pet.models import Category, Pet
+
+SQLITE_SCAN = re.compile(r"^SCAN (?:TABLE )?(\w+)(?: AS \w+)?$")
+
+
+def filtered_endpoints(samples):
+    """Catalog queries the storefront runs besides the plain list"""
+    url = reverse("pets-list")
+    category = samples["category"].pk
+    return [
+        Endpoint("pets-filter", f"{url}?category={category}&price__lt=500", False),
+        Endpoint(
+            "pets-filter-ordered",
+            f"{url}?category={category}&price__gt=100&ordering=price",
+            False,
+        ),
+        Endpoint("pets-ordered", f"{url}?ordering=price", False),
+        Endpoint("pets-search", f"{url}?search=retriever", False),
+    ]
+
+
+# A value for every filter of PetFilter, keyed by field name. Each filter
+# is checked on its own and must be answered from an index.
+FILTER_VALUES = {
+    "category": lambda s: s["category"].pk,
+    "availability": lambda s: "true",
+    "age": lambda s: 3,
+    "breed": lambda s: "Gold",
+    "price": lambda s: 100,
+    "rating_avg": lambda s: 4,
+    "rating_count": lambda s: 3,
+}
+
+
+def filter_queries(samples):
+    """Return (name, SQL) of the queryset behind every PetFilter filter"""
+    queries = []
+    for name, filter_ in PetFilter.base_filters.items():
+        if filter_.field_name not in FILTER_VALUES:
+            raise ImproperlyConfigured(f"No sample value for PetFilter.{name}")
+        value = FILTER_VALUES[filter_.field_name](samples)
+        if filter_.lookup_expr == "in":
+            other = Category.objects.exclude(pk=value).values_list("pk", flat=True)
+            value = f"{value},{other[0]}"
+        filterset = PetFilter({name: value}, queryset=Pet.objects.order_by())
+        if not filterset.is_valid():
+            raise ImproperlyConfigured(f"Invalid sample for PetFilter.{name}")
+        sql, params = filterset.qs.values("pk").query.sql_with_params()
+        queries.append((name, sql, params))
+    return queries
+
+
+def unindexed_scans(sql, params):
+    """
+    Return the tables PostgreSQL still reads in full with sequential scans
+    disabled: sequential scans, and index scans without an index condition
+    on a non-partial index.
+    """
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT indexrelid::regclass::text FROM pg_index "
+            "WHERE indpred IS NOT NULL"
+        )
+        partial = {row[0] for row in cursor.fetchall()}
+        cursor.execute("SET LOCAL enable_seqscan = off")
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    nodes, tables = [plan[0]["Plan"]], set()
+    while nodes:
+        node = nodes.pop()
+        nodes.extend(node.get("Plans", []))
+        if node["Node Type"] == "Seq Scan":
+            tables.add(node["Relation Name"])
+        elif node["Node Type"] in ("Index Scan", "Index Only Scan"):
+            if "Index Cond" not in node and node["Index Name"] not in partial:
+                tables.add(node["Relation Name"])
+        elif node["Node Type"] == "Bitmap Index Scan":
+            if "Index Cond" not in node and node["Index Name"] not in partial:
+                tables.add(node["Index Name"])
+    return tables
+
+
+def sequential_scans(sql, enable_seqscan=True):
+    """
+    Return (table, estimated rows, top-N) for every full table scan in the
+    plan of ``sql``. ``top-N`` is set when the scan only feeds a sort under
+    a LIMIT, i.e. an index on the ordering would let it stop early. Row
+    estimates are only available on PostgreSQL, where ``enable_seqscan``
+    can also be turned off to see whether any index could serve the query.
+    """
+    with transaction.atomic(), connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            if not enable_seqscan:
+                cursor.execute("SET LOCAL enable_seqscan = off")
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}")
+            plan = cursor.fetchone()[0]
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            nodes, scans = [(plan[0]["Plan"], ())], []
+            while nodes:
+                node, parents = nodes.pop()
+                if node["Node Type"] == "Seq Scan":
+                    top_n = "Limit" in parents and "Sort" in parents
+                    scans.append((node["Relation Name"], node["Plan Rows"], top_n))
+                parents += (node["Node Type"],)
+                nodes.extend((child, parents) for child in node.get("Plans", []))
+            return scans
+
+        cursor.execute(f"EXPLAIN QUERY PLAN {sql}")
+        details = [detail for *_, detail in cursor.fetchall()]
+        top_n = " LIMIT " in sql and any("TEMP B-TREE" in d for d in details)
+        return [
+            (match.group(1), None, top_n)
+            for detail in details
+            if (match := SQLITE_SCAN.match(detail))
+        ]
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway database, EXPLAIN every query run by the endpoints in "
+        "api/urls.py and fail on sequential scans of large tables that no index "
+        "can replace: selective filters (PostgreSQL) and top-N sorts"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--scale", type=int, default=100)
+        parser.add_argument(
+            "--min-rows",
+            type=int,
+            default=1000,
+            help="Ignore full scans of tables smaller than this",
+        )
+        parser.add_argument(
+            "--selectivity",
+            type=float,
+            default=0.05,
+            help="Flag scans expected to return less than this share of the table",
+        )
+
+    def handle(self, *args, **options):
+        with throwaway_database():
+            samples = seed_samples(options["scale"])
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE")
+            endpoints = discover_endpoints(samples) + filtered_endpoints(samples)
+            findings = self.explain(endpoints, samples, options)
+            filters = self.check_filters(samples)
+
+        failures = []
+        for endpoint in endpoints:
+            scans = findings[endpoint.name]
+            status = ", ".join(sorted(scans)) if scans else "ok"
+            self.stdout.write(f"{endpoint.name:<22} {status}")
+            for table, sql in scans.items():
+                failures.append(f"{endpoint.name}: sequential scan on {table}\n  {sql}")
+
+        for name, sql, scans in filters:
+            self.stdout.write(f"filter {name:<15} {', '.join(sorted(scans)) or 'ok'}")
+            if scans:
+                failures.append(f"filter {name} is not index-backed\n  {sql}")
+
+        if failures:
+            raise CommandError("\n".join(failures))
+        self.stdout.write(self.style.SUCCESS("No sequential scans on large tables"))
+
+    def explain(self, endpoints, samples, options):
+        clients = {False: api_client(), True: api_client(samples["user"])}
+        cache = get_catalog_cache()
+        sizes = {}
+        findings = {}
+        for endpoint in endpoints:
+            cache.clear()
+            with CaptureQueriesContext(connection) as queries:
+                response = clients[endpoint.authenticated].get(endpoint.url)
+            if response.status_code != 200:
+                raise CommandError(
+                    f"{endpoint.name}: {endpoint.url} returned {response.status_code}"
+                )
+            scans = {}
+            for query in queries.captured_queries:
+                sql = query["sql"]
+                if not sql.lstrip().upper().startswith("SELECT"):
+                    continue
+                candidates = set()
+                for table, rows, top_n in sequential_scans(sql):
+                    if table not in sizes:
+                        sizes[table] = self.table_size(table)
+                    if sizes[table] < options["min_rows"]:
+                        continue
+                    selective = (
+                        rows is not None
+                        and rows < sizes[table] * options["selectivity"]
+                    )
+                    if selective or top_n:
+                        candidates.add(table)
+                if candidates and connection.vendor == "postgresql":
+                    # Small tables are scanned even when an index exists; only
+                    # report the ones the planner has no index for.
+                    candidates &= {
+                        table
+                        for table, *_ in sequential_scans(sql, enable_seqscan=False)
+                    }
+                for table in candidates:
+                    scans.setdefault(table, sql)
+            findings[endpoint.name] = scans
+        return findings
+
+    def check_filters(self, samples):
+        """PetFilter coverage, checked on PostgreSQL only (the production DB)"""
+        if connection.vendor != "postgresql":
+            self.stdout.write("Skipping the PetFilter index checks, needs PostgreSQL")
+            return []
+        return [
+            (name, sql % tuple(params), unindexed_scans(sql, params))
+            for name, sql, params in filter_queries(samples)
+        ]
+
+    def table_size(self, table):
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT COUNT(*) FROM {connection.ops.quote_name(table)}")
+            return cursor.fetchone()[0]
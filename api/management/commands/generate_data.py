@@ -0,0 +1,68 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from api import datagen
+
+
+class Command(BaseCommand):
+    help = (
+        "Bulk-load synthetic categories, pets, images, users, reviews, "
+        "adoptions and payments for load testing"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--categories", type=int, default=20)
+        parser.add_argument("--pets", type=int, default=10000)
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--images-per-pet", type=int, default=2)
+        parser.add_argument("--reviews", type=int, default=20000)
+        parser.add_argument("--adoptions", type=int, default=1000)
+        parser.add_argument("--payments", type=int, default=500)
+        parser.add_argument(
+            "--category-skew",
+            type=float,
+            default=1.0,
+            help="Zipf exponent for pets per category, 0 for uniform",
+        )
+        parser.add_argument(
+            "--review-skew",
+            type=float,
+            default=1.0,
+            help="Zipf exponent for reviews per pet, 0 for uniform",
+        )
+        parser.add_argument(
+            "--price-distribution",
+            choices=["uniform", "lognormal"],
+            default="lognormal",
+        )
+        parser.add_argument("--price-mean", type=float, default=500)
+        parser.add_argument("--with-fixture", action="store_true")
+        parser.add_argument("--seed", type=int, default=None)
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        with transaction.atomic():
+            if options["with_fixture"]:
+                datagen.load_fixture()
+            created = datagen.generate(
+                categories=options["categories"],
+                pets=options["pets"],
+                users=options["users"],
+                images_per_pet=options["images_per_pet"],
+                reviews=options["reviews"],
+                adoptions=options["adoptions"],
+                payments=options["payments"],
+                category_skew=options["category_skew"],
+                review_skew=options["review_skew"],
+                price_distribution=options["price_distribution"],
+                price_mean=options["price_mean"],
+                seed=options["seed"],
+                batch_size=options["batch_size"],
+            )
+        elapsed = time.perf_counter() - start
+
+        for kind, pks in created.items():
+            self.stdout.write(f"{kind:<12} {len(pks):>10}")
+        self.stdout.write(self.style.SUCCESS(f"Generated in {elapsed:.1f}s"))
@@ -0,0 +1,298 @@
+import json
+import random
+import subprocess
+import time
+from contextlib import nullcontext
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test.utils import override_settings
+from django.urls import reverse
+from adoption.models import Adopt
+from api import datagen
+from api.benchmarks import api_client, measure, summarize, throwaway_database
+from pet.cache import get_catalog_cache
+from pet.models import Category, Pet
+from users.models import User
+
+SEARCH_TERMS = ["gold", "retriever", "cat", "playful", "loyal dog", "ham"]
+
+
+class Command(BaseCommand):
+    help = (
+        "Drive the API in-process through the test client and write a JSON "
+        "report with throughput and p50/p95/p99 latency per scenario"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=200)
+        parser.add_argument("--warmup", type=int, default=10)
+        parser.add_argument("--output", default="benchmark-report.json")
+        parser.add_argument(
+            "--scenario",
+            action="append",
+            dest="scenarios",
+            help="Only run the given scenario (repeatable)",
+        )
+        parser.add_argument(
+            "--use-current-db",
+            action="store_true",
+            help="Benchmark the configured database (e.g. loaded with "
+            "generate_data) instead of a seeded throwaway one",
+        )
+        parser.add_argument(
+            "--allow-writes",
+            action="store_true",
+            help="Run the write scenarios against the current database",
+        )
+        parser.add_argument("--pets", type=int, default=10000)
+        parser.add_argument(
+            "--warm-cache",
+            action="store_true",
+            help="Keep the catalog cache between requests",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--without-instrumentation",
+            action="store_true",
+            help="Disable PerformanceMiddleware to measure its overhead",
+        )
+        parser.add_argument(
+            "--without-fast-serializers",
+            action="store_true",
+            help="Serve list endpoints through the DRF serializers",
+        )
+        parser.add_argument(
+            "--without-user-cache",
+            action="store_true",
+            help="Load the user of every authenticated request from the database",
+        )
+
+    def handle(self, *args, **options):
+        instrumentation = nullcontext()
+        if options["without_instrumentation"]:
+            instrumentation = override_settings(
+                PERFORMANCE_INSTRUMENTATION={
+                    **settings.PERFORMANCE_INSTRUMENTATION,
+                    "ENABLED": False,
+                }
+            )
+        fast_serializers = nullcontext()
+        if options["without_fast_serializers"]:
+            fast_serializers = override_settings(FAST_SERIALIZERS=False)
+        user_cache = nullcontext()
+        if options["without_user_cache"]:
+            user_cache = override_settings(
+                AUTH_USER_CACHE={**settings.AUTH_USER_CACHE, "ENABLED": False}
+            )
+        with instrumentation, fast_serializers, user_cache:
+            report = self.benchmark(options)
+        self.write(report, options)
+
+    def benchmark(self, options):
+        if options["use_current_db"]:
+            report = self.run(options, writes=options["allow_writes"])
+        else:
+            with throwaway_database():
+                datagen.load_fixture()
+                datagen.generate(
+                    categories=20,
+                    pets=options["pets"],
+                    users=max(10, options["pets"] // 10),
+                    images_per_pet=2,
+                    reviews=options["pets"] * 2,
+                    adoptions=options["pets"] // 20,
+                    category_skew=1.0,
+                    review_skew=1.0,
+                    price_distribution="lognormal",
+                    seed=options["seed"],
+                )
+                report = self.run(options, writes=True)
+        return report
+
+    def write(self, report, options):
+        with open(options["output"], "w") as output:
+            json.dump(report, output, indent=2, sort_keys=True)
+            output.write("\n")
+
+        self.stdout.write(
+            f"{'scenario':<24} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} "
+            f"{'p99 ms':>8} {'queries':>8} {'bytes':>8}"
+        )
+        for name, result in report["scenarios"].items():
+            self.stdout.write(
+                f"{name:<24} {result['throughput']:>9} {result['latency']['p50']:>8} "
+                f"{result['latency']['p95']:>8} {result['latency']['p99']:>8} "
+                f"{result['queries']:>8} {result['bytes']:>8}"
+            )
+        self.stdout.write(self.style.SUCCESS(f"Report written to {options['output']}"))
+
+    def scenarios(self, rng, writes):
+        """
+        Map scenario names to (method, authenticated, request factory). A
+        factory returns the URL and body of the next request; authenticated
+        is a bool (anonymous or the benchmark user) or the User to log in as.
+        """
+        pet_ids = list(Pet.objects.order_by("?").values_list("pk", flat=True)[:1000])
+        category_ids = list(Category.objects.values_list("pk", flat=True))
+        reviewed_pet = (
+            Pet.objects.order_by("-rating_count").values_list("pk", flat=True).first()
+        )
+        if not pet_ids or reviewed_pet is None:
+            raise CommandError("The database has no pets, run generate_data first")
+        collector = (
+            Adopt.objects.annotate(adoptions_count=Count("adoptions"))
+            .order_by("-adoptions_count")
+            .select_related("user")
+            .first()
+        )
+        cursor = {"next": None}
+
+        def cursor_page():
+            url = cursor["next"] or reverse("pets-list") + "?cursor="
+            return url, None
+
+        scenarios = {
+            "catalog-list": ("get", False, lambda: (reverse("pets-list"), None)),
+            "catalog-cursor": ("get", False, cursor_page),
+            "catalog-grid": (
+                "get",
+                False,
+                lambda: (reverse("pets-list") + "?fields=id,name,price,images", None),
+            ),
+            "catalog-lean": (
+                "get",
+                False,
+                lambda: (reverse("pets-list") + "?omit=description,images", None),
+            ),
+            "search": (
+                "get",
+                False,
+                lambda: (
+                    reverse("pets-list") + "?search=" + rng.choice(SEARCH_TERMS),
+                    None,
+                ),
+            ),
+            "filter": (
+                "get",
+                False,
+                lambda: (
+                    reverse("pets-list")
+                    + f"?category={rng.choice(category_ids)}&price__lt=500"
+                    + "&ordering=price",
+                    None,
+                ),
+            ),
+            "retrieve": (
+                "get",
+                False,
+                lambda: (reverse("pets-detail", args=[rng.choice(pet_ids)]), None),
+            ),
+            "review-list": (
+                "get",
+                False,
+                lambda: (reverse("pet-review-list", args=[reviewed_pet]), None),
+            ),
+            "user-me": ("get", True, lambda: (reverse("user-me"), None)),
+            "has-adopted": (
+                "get",
+                True,
+                lambda: (reverse("has-adopted", args=[rng.choice(pet_ids)]), None),
+            ),
+        }
+        if collector is not None:
+            scenarios["adoption-list"] = (
+                "get",
+                collector.user,
+                lambda: (reverse("adoptions-list"), None),
+            )
+            scenarios["adoption-list-projected"] = (
+                "get",
+                collector.user,
+                lambda: (
+                    reverse("adoptions-list") + "?fields=id,pet.name,pet.price",
+                    None,
+                ),
+            )
+        if writes:
+            available = iter(
+                Pet.objects.filter(availability=True)
+                .order_by("?")
+                .values_list("pk", flat=True)
+            )
+            scenarios["adoption-create"] = (
+                "post",
+                True,
+                lambda: (reverse("adoptions-list"), {"pet_id": next(available)}),
+            )
+        return scenarios, cursor
+
+    def run(self, options, writes):
+        rng = random.Random(options["seed"])
+        scenarios, cursor = self.scenarios(rng, writes)
+        selected = options["scenarios"] or list(scenarios)
+        unknown = set(selected) - set(scenarios)
+        if unknown:
+            raise CommandError(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+
+        user = User.objects.create_user(
+            email=f"bench-{time.time_ns()}@example.com",
+            account_balance=Decimal("99999999.00"),
+        )
+        clients = {False: api_client(), True: api_client(user)}
+        cache = get_catalog_cache()
+        before_request = None if options["warm_cache"] else cache.clear
+
+        results = {}
+        for name in selected:
+            method, authenticated, next_request = scenarios[name]
+            if authenticated not in clients:
+                clients[authenticated] = api_client(authenticated)
+            client = clients[authenticated]
+            samples = []
+            for i in range(options["warmup"] + options["requests"]):
+                url, data = next_request()
+                result = measure(client, url, before_request, method, data)
+                if result.status >= 400:
+                    raise CommandError(f"{name}: {url} returned {result.status}")
+                if name == "catalog-cursor":
+                    cursor["next"] = result.response.json()["next"]
+                if i >= options["warmup"]:
+                    samples.append(result)
+
+            seconds = [sample.seconds for sample in samples]
+            results[name] = {
+                "requests": len(samples),
+                "throughput": round(len(samples) / sum(seconds), 1),
+                "latency": summarize(seconds),
+                "queries": round(sum(s.queries for s in samples) / len(samples), 2),
+                "bytes": round(sum(s.bytes for s in samples) / len(samples)),
+            }
+
+        return {"meta": self.meta(options), "scenarios": results}
+
+    def meta(self, options):
+        try:
+            commit = subprocess.run(
+                ["git", "rev-parse", "--short", "HEAD"],
+                capture_output=True,
+                text=True,
+                cwd=settings.BASE_DIR,
+            ).stdout.strip()
+        except OSError:
+            commit = ""
+        counts = Category.objects.aggregate(categories=Count("id"))
+        counts["pets"] = Pet.objects.count()
+        return {
+            "commit": commit,
+            "database": connection.vendor,
+            "dataset": counts,
+            "requests": options["requests"],
+            "warm_cache": options["warm_cache"],
+            "instrumentation": not options["without_instrumentation"],
+            "fast_serializers": settings.FAST_SERIALIZERS,
+            "user_cache": settings.AUTH_USER_CACHE["ENABLED"],
+        }
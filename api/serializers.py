@@ -0,0 +1,84 @@
+class DynamicFieldsMixin:
+    """
+    Let clients choose the fields of a response with ``?fields=a,b`` or drop
+    some with ``?omit=a,b``. Fields of nested serializers using the mixin are
+    addressed with dots: ``?fields=id,pet.name`` or ``?omit=pet.images``.
+
+    Only the serializer built by the view reads the query string; nested
+    serializers are instantiated without a request in their context and get
+    their part of the selection from their parent.
+    """
+
+    fields_query_param = "fields"
+    omit_query_param = "omit"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get("request")
+        if request is None:
+            return
+        self.select_fields(
+            self._parse(request, self.fields_query_param),
+            self._parse(request, self.omit_query_param),
+        )
+
+    @classmethod
+    def _parse(cls, request, param):
+        """
+        Parse ``a,b.c,b.d`` into ``{"a": None, "b": {"c": None, "d": None}}``
+        where None stands for the whole field.
+        """
+        value = request.query_params.get(param)
+        if value is None:
+            return None
+        tree = {}
+        for path in value.split(","):
+            names = [name.strip() for name in path.split(".")]
+            if not all(names):
+                continue
+            node = tree
+            for name in names[:-1]:
+                if name in node and node[name] is None:
+                    break
+                node = node.setdefault(name, {})
+            else:
+                node[names[-1]] = None
+        return tree
+
+    def select_fields(self, wanted, omitted):
+        """
+        Keep the fields named in the ``wanted`` tree (all of them when None)
+        minus the ones in the ``omitted`` tree, recursing into nested
+        serializers that use the mixin.
+        """
+        if wanted is None and omitted is None:
+            return
+        for name in list(self.fields):
+            if wanted is not None and name not in wanted:
+                self.fields.pop(name)
+                continue
+            if omitted is not None and name in omitted and omitted[name] is None:
+                self.fields.pop(name)
+                continue
+            field = self.fields[name]
+            nested = getattr(field, "child", field)
+            if isinstance(nested, DynamicFieldsMixin):
+                nested.select_fields(
+                    wanted.get(name) if wanted is not None else None,
+                    omitted.get(name) if omitted is not None else None,
+                )
+
+    def get_deferred_fields(self, keep=()):
+        """
+        Return the concrete model fields that none of the selected fields
+        read, for ``QuerySet.defer()``. Fields in ``keep`` are never
+        returned.
+        """
+        used = {field.source.split(".")[0] for field in self.fields.values()}
+        return [
+            field.name
+            for field in self.Meta.model._meta.concrete_fields
+            if not field.primary_key
+            and field.name not in used
+            and field.name not in keep
+        ]
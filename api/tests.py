@@ -1,3 +1,89 @@
-from django.test import TestCase
+import tempfile
+from io import StringIO
 
-# Create your tests here.
+from django.conf import settings
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APIClient
+
+from api.management.commands.check_import_budget import cold_start, eager_lazy_modules
+from fur_nest import settings as project_settings
+from fur_nest.schema import get_artifact_name, get_schema
+from pet.cache import get_catalog_cache
+from pet.models import Category
+
+
+def instrumentation(**options):
+    return override_settings(
+        PERFORMANCE_INSTRUMENTATION={
+            **settings.PERFORMANCE_INSTRUMENTATION,
+            **options,
+        }
+    )
+
+
+class PerformanceMiddlewareTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        Category.objects.create(name="Dogs")
+
+    def get(self):
+        get_catalog_cache().clear()
+        return APIClient().get("/api/v1/categories/")
+
+    @override_settings(DEBUG=False)
+    def test_server_timing_is_off_by_default_in_production(self):
+        options = {
+            key: value
+            for key, value in settings.PERFORMANCE_INSTRUMENTATION.items()
+            if key != "SERVER_TIMING"
+        }
+        with override_settings(PERFORMANCE_INSTRUMENTATION=options):
+            response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("Server-Timing", response)
+
+    def test_server_timing_reports_serialization_apart(self):
+        with instrumentation(SERVER_TIMING=True):
+            response = self.get()
+        metrics = [part.split(";")[0] for part in response["Server-Timing"].split(", ")]
+        self.assertEqual(metrics, ["db", "serialize", "render", "app", "total"])
+
+
+class ColdStartTests(SimpleTestCase):
+    """
+    What a cold start imports. Its time and module count depend on the
+    machine and the dependencies; check_import_budget measures those.
+    """
+
+    def test_lazy_modules_are_not_imported_on_startup(self):
+        _, modules, _ = cold_start(settings.WSGI_APPLICATION.rsplit(".", 1)[0])
+        self.assertEqual(eager_lazy_modules(modules), [])
+
+
+# The test runner adds "testserver" to ALLOWED_HOSTS, the deployment doesn't
+@override_settings(ALLOWED_HOSTS=project_settings.ALLOWED_HOSTS)
+class OpenAPISchemaTests(TestCase):
+    def setUp(self):
+        static_root = tempfile.TemporaryDirectory()
+        self.addCleanup(static_root.cleanup)
+        overridden = override_settings(STATIC_ROOT=static_root.name)
+        overridden.enable()
+        self.addCleanup(overridden.disable)
+        for cached in (get_artifact_name, get_schema):
+            cached.cache_clear()
+            self.addCleanup(cached.cache_clear)
+
+    def test_build_and_check(self):
+        call_command("build_openapi_schema", stdout=StringIO())
+        output = StringIO()
+        call_command("build_openapi_schema", "--check", stdout=output)
+        self.assertIn("is up to date", output.getvalue())
+
+    def test_generated_without_artifact(self):
+        host = project_settings.ALLOWED_HOSTS[-1]
+        response = self.client.get(
+            "/swagger/", {"format": "openapi"}, HTTP_HOST=host
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("paths", response.json())
@@ -0,0 +1,43 @@
+import time
+from contextlib import contextmanager
+
+from rest_framework.response import Response
+
+
+@contextmanager
+def serialization_timer(request):
+    """
+    Count the block as serialization time of ``request`` in the
+    PerformanceMiddleware metrics, minus the SQL it ran (lazy relations).
+    """
+    metrics = getattr(request, "_performance_metrics", None)
+    if metrics is None:
+        yield
+        return
+    start, sql_time = time.perf_counter(), metrics.sql_time
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        metrics.serialize_time += elapsed - (metrics.sql_time - sql_time)
+
+
+class TimedSerializationMixin:
+    """``list`` and ``retrieve`` reporting the serializer's ``.data`` apart"""
+
+    def serialize(self, serializer):
+        with serialization_timer(self.request):
+            return serializer.data
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(self.serialize(serializer))
+        serializer = self.get_serializer(queryset, many=True)
+        return Response(self.serialize(serializer))
+
+    def retrieve(self, request, *args, **kwargs):
+        serializer = self.get_serializer(self.get_object())
+        return Response(self.serialize(serializer))
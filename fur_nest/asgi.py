@@ -3,6 +3,11 @@ ASGI config for fur_nest project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Serving it with an ASGI server (e.g. ``uvicorn fur_nest.asgi:application``)
+lets async views such as adoption.views.initiate_payment wait on the payment
+gateway without holding a worker. Run it with DB_CONN_MAX_AGE=0 (or
+DB_POOL=True), see the connection settings.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
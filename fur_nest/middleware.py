@@ -0,0 +1,189 @@
+import json
+import logging
+import random
+import time
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+logger = logging.getLogger("fur_nest.performance")
+slow_logger = logging.getLogger("fur_nest.performance.slow")
+
+
+class RequestMetrics:
+    """Per-request counters filled by the database execute wrapper"""
+
+    def __init__(self, max_queries):
+        self.max_queries = max_queries
+        self.query_count = 0
+        self.sql_time = 0.0
+        self.queries = []
+        self.render_start = None
+        self.render_time = 0.0
+        # Filled by api.timing.serialization_timer
+        self.serialize_time = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.query_count += 1
+            self.sql_time += elapsed
+            if len(self.queries) < self.max_queries:
+                self.queries.append((elapsed, sql))
+
+    def rendered(self, response):
+        self.render_time = time.perf_counter() - self.render_start
+
+
+def install_wrappers(stack, metrics):
+    for connection in connections.all():
+        stack.enter_context(connection.execute_wrapper(metrics))
+
+
+class PerformanceMiddleware:
+    """
+    Record wall time, query count, SQL time, serialization time, render time
+    and response size of every request. The numbers are logged as JSON on
+    ``fur_nest.performance`` (INFO) and, with ``SERVER_TIMING`` (DEBUG by
+    default), sent back in a ``Server-Timing`` header. Requests slower than
+    ``SLOW_REQUEST_MS`` are logged on ``fur_nest.performance.slow``
+    (WARNING) with their slowest SQL, sampled by ``SLOW_REQUEST_SAMPLE_RATE``.
+
+    Under ASGI the database runs on the request's sync thread, so that is
+    where the query wrappers are installed.
+    """
+
+    async_capable = True
+    sync_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        config = settings.PERFORMANCE_INSTRUMENTATION
+        self.enabled = config.get("ENABLED", True)
+        self.server_timing = config.get("SERVER_TIMING", settings.DEBUG)
+        self.slow_request_ms = config.get("SLOW_REQUEST_MS", 500)
+        self.slow_sample_rate = config.get("SLOW_REQUEST_SAMPLE_RATE", 1.0)
+        self.max_queries = config.get("MAX_CAPTURED_QUERIES", 50)
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not self.enabled:
+            return self.get_response(request)
+
+        metrics = RequestMetrics(self.max_queries)
+        request._performance_metrics = metrics
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            install_wrappers(stack, metrics)
+            response = self.get_response(request)
+        return self.record(request, response, metrics, time.perf_counter() - start)
+
+    async def __acall__(self, request):
+        if not self.enabled:
+            return await self.get_response(request)
+
+        metrics = RequestMetrics(self.max_queries)
+        request._performance_metrics = metrics
+        start = time.perf_counter()
+        stack = ExitStack()
+        await sync_to_async(install_wrappers)(stack, metrics)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+        return self.record(request, response, metrics, time.perf_counter() - start)
+
+    def record(self, request, response, metrics, total):
+        timings = {
+            "total_ms": round(total * 1000, 2),
+            "db_ms": round(metrics.sql_time * 1000, 2),
+            "serialize_ms": round(metrics.serialize_time * 1000, 2),
+            "render_ms": round(metrics.render_time * 1000, 2),
+            "app_ms": round(
+                (
+                    total
+                    - metrics.sql_time
+                    - metrics.serialize_time
+                    - metrics.render_time
+                )
+                * 1000,
+                2,
+            ),
+        }
+        size = None if response.streaming else len(response.content)
+        if self.server_timing:
+            response["Server-Timing"] = (
+                f'db;dur={timings["db_ms"]};desc="{metrics.query_count} queries", '
+                f'serialize;dur={timings["serialize_ms"]}, '
+                f'render;dur={timings["render_ms"]}, '
+                f'app;dur={timings["app_ms"]}, '
+                f'total;dur={timings["total_ms"]}'
+            )
+
+        is_slow = timings["total_ms"] >= self.slow_request_ms
+        if logger.isEnabledFor(logging.INFO) or is_slow:
+            record = {
+                "method": request.method,
+                "path": request.path,
+                "status": response.status_code,
+                "queries": metrics.query_count,
+                "bytes": size,
+                **timings,
+            }
+            logger.info(json.dumps(record))
+            if is_slow and random.random() < self.slow_sample_rate:
+                slowest = sorted(metrics.queries, key=lambda query: -query[0])[:10]
+                record["sql"] = [
+                    {"ms": round(elapsed * 1000, 2), "sql": sql[:1000]}
+                    for elapsed, sql in slowest
+                ]
+                slow_logger.warning(json.dumps(record))
+        return response
+
+    def process_template_response(self, request, response):
+        metrics = getattr(request, "_performance_metrics", None)
+        if metrics is not None:
+            metrics.render_start = time.perf_counter()
+            response.add_post_render_callback(metrics.rendered)
+        return response
+
+
+class StaticFilesMiddleware(WhiteNoiseMiddleware):
+    """
+    WhiteNoiseMiddleware that can run under ASGI: a sync-only middleware
+    makes Django run the rest of the chain, async views included, on one
+    thread, one request at a time.
+    """
+
+    async_capable = True
+    sync_capable = True
+
+    def __init__(self, get_response=None, settings=settings):
+        super().__init__(get_response, settings)
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = await sync_to_async(self.find_file)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return await sync_to_async(self.serve)(static_file, request)
+        return await self.get_response(request)
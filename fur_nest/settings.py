@@ -10,10 +10,10 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import tempfile
 from pathlib import Path
 from datetime import timedelta
 from decouple import config
-import cloudinary
 
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -35,7 +35,6 @@ AUTH_USER_MODEL = "users.User"
 
 INSTALLED_APPS = [
     "whitenoise.runserver_nostatic",
-    "debug_toolbar",
     "django.contrib.admin",
     "django.contrib.auth",
     "django.contrib.contenttypes",
@@ -46,7 +45,6 @@ INSTALLED_APPS = [
     "django_filters",
     "corsheaders",
     "rest_framework",
-    "anymail",
     "djoser",
     "users",
     "api",
@@ -55,10 +53,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "fur_nest.middleware.PerformanceMiddleware",
     "corsheaders.middleware.CorsMiddleware",
-    "debug_toolbar.middleware.DebugToolbarMiddleware",
     "django.middleware.security.SecurityMiddleware",
-    "whitenoise.middleware.WhiteNoiseMiddleware",
+    "fur_nest.middleware.StaticFilesMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -106,6 +104,18 @@ CORS_ALLOWED_ORIGINS = ["http://localhost:5173", "https://fn-ui.vercel.app"]
 # }
 
 
+# Connection management. By default every worker keeps its connection for
+# DB_CONN_MAX_AGE seconds and checks it before reusing it in a new request.
+# DB_POOL=True switches to a psycopg pool of DB_POOL_MIN_SIZE to
+# DB_POOL_MAX_SIZE connections per worker process instead (needs psycopg 3
+# and psycopg-pool; Django doesn't combine pools with CONN_MAX_AGE).
+# Statements running longer than DB_STATEMENT_TIMEOUT milliseconds are
+# cancelled by the server, 0 disables the limit (e.g. for long migrations).
+# Under ASGI every request runs in a thread of its own, which would strand
+# persistent connections: set DB_CONN_MAX_AGE=0 or use DB_POOL there.
+DB_POOL = config("DB_POOL", default=False, cast=bool)
+DB_STATEMENT_TIMEOUT = config("DB_STATEMENT_TIMEOUT", default=30000, cast=int)
+
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.postgresql",
@@ -114,7 +124,126 @@ DATABASES = {
         "PASSWORD": config("password"),
         "HOST": config("host"),
         "PORT": config("port"),
+        "CONN_MAX_AGE": (
+            0 if DB_POOL else config("DB_CONN_MAX_AGE", default=60, cast=int)
+        ),
+        "CONN_HEALTH_CHECKS": config("DB_CONN_HEALTH_CHECKS", default=True, cast=bool),
+        "OPTIONS": {},
+    }
+}
+if DB_STATEMENT_TIMEOUT:
+    DATABASES["default"]["OPTIONS"]["options"] = (
+        f"-c statement_timeout={DB_STATEMENT_TIMEOUT}"
+    )
+if DB_POOL:
+    DATABASES["default"]["OPTIONS"]["pool"] = {
+        "min_size": config("DB_POOL_MIN_SIZE", default=1, cast=int),
+        "max_size": config("DB_POOL_MAX_SIZE", default=4, cast=int),
+        "timeout": config("DB_POOL_TIMEOUT", default=10, cast=float),
     }
+
+# Cache
+# The catalog cache works with any Django backend, e.g. locmem (default) or
+# CACHE_BACKEND=django.core.cache.backends.filebased.FileBasedCache with
+# CACHE_LOCATION pointing at a writable directory. Its entries are keyed by
+# the count and last updated_at of the rows they show (pet.cache), so even
+# per-process caches see writes made elsewhere on the next request;
+# CATALOG_CACHE_TIMEOUT only bounds a write committed with an updated_at
+# older than the latest one already seen.
+
+CACHES = {
+    "default": {
+        "BACKEND": config(
+            "CACHE_BACKEND", default="django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": config("CACHE_LOCATION", default="fur-nest"),
+    },
+    # Authenticated users (users.authentication), kept apart from the
+    # catalog so clearing one leaves the other warm
+    "users": {
+        "BACKEND": config(
+            "CACHE_BACKEND", default="django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": config("USER_CACHE_LOCATION", default="fur-nest-users"),
+    },
+}
+
+CATALOG_CACHE = {
+    "ALIAS": "default",
+    "TIMEOUT": config("CATALOG_CACHE_TIMEOUT", default=300, cast=int),
+}
+
+# Serve read-only list endpoints from .values() rows (api.fast)
+FAST_SERIALIZERS = config("FAST_SERIALIZERS", default=True, cast=bool)
+
+# Batch image uploads (pet.uploads): files are staged on local disk and
+# uploaded by a pool of WORKERS threads. The local backend copies them to
+# LOCAL_DIR instead of Cloudinary, for development and offline tests.
+# Staging defaults to the temporary directory, the only writable one on
+# Vercel; it's created on first use.
+PET_IMAGE_UPLOADS = {
+    "BACKEND": config(
+        "PET_IMAGE_UPLOAD_BACKEND", default="pet.uploads.CloudinaryBackend"
+    ),
+    "STAGING_DIR": config(
+        "PET_IMAGE_STAGING_DIR",
+        default=str(Path(tempfile.gettempdir()) / "fur-nest" / "pet-images"),
+    ),
+    "LOCAL_DIR": config(
+        "PET_IMAGE_LOCAL_DIR", default=str(BASE_DIR / "media" / "pet-images")
+    ),
+    "FOLDER": "fur-nest",
+    "WORKERS": config("PET_IMAGE_UPLOAD_WORKERS", default=4, cast=int),
+    "MAX_ATTEMPTS": config("PET_IMAGE_UPLOAD_ATTEMPTS", default=3, cast=int),
+    "RETRY_DELAY": config("PET_IMAGE_UPLOAD_RETRY_DELAY", default=1.0, cast=float),
+    "MAX_FILES": 20,
+}
+
+# Uploaded pet images are validated, stripped of EXIF, fitted within
+# MAX_DIMENSION and re-encoded (pet.processing) in a pool of WORKERS
+# processes (one per CPU when None) by the background upload workers,
+# before they are stored.
+PET_IMAGE_PROCESSING = {
+    "ENABLED": config("PET_IMAGE_PROCESSING", default=True, cast=bool),
+    "FORMAT": config("PET_IMAGE_FORMAT", default="WEBP"),
+    "QUALITY": config("PET_IMAGE_QUALITY", default=80, cast=int),
+    "MAX_DIMENSION": config("PET_IMAGE_MAX_DIMENSION", default=1600, cast=int),
+    "MAX_PIXELS": 50_000_000,
+    "WORKERS": config("PET_IMAGE_PROCESSING_WORKERS", default=0, cast=int) or None,
+}
+
+# Users resolved from JWTs are cached (users.authentication) and dropped
+# when saved. Keep TIMEOUT short with per-process caches like LocMemCache:
+# other processes only notice a change (e.g. is_active) once it expires.
+AUTH_USER_CACHE = {
+    "ENABLED": config("AUTH_USER_CACHE", default=True, cast=bool),
+    "ALIAS": "users",
+    "TIMEOUT": config("AUTH_USER_CACHE_TIMEOUT", default=60, cast=int),
+}
+
+PERFORMANCE_INSTRUMENTATION = {
+    "ENABLED": config("PERF_INSTRUMENTATION", default=True, cast=bool),
+    # Exposes query counts and timings to clients, keep it off in production
+    "SERVER_TIMING": config("PERF_SERVER_TIMING", default=DEBUG, cast=bool),
+    "SLOW_REQUEST_MS": config("PERF_SLOW_REQUEST_MS", default=500, cast=int),
+    "SLOW_REQUEST_SAMPLE_RATE": config(
+        "PERF_SLOW_REQUEST_SAMPLE_RATE", default=1.0, cast=float
+    ),
+    "MAX_CAPTURED_QUERIES": 50,
+}
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {"console": {"class": "logging.StreamHandler"}},
+    "loggers": {
+        # INFO logs every request, WARNING only the slow ones
+        "fur_nest.performance": {
+            "handlers": ["console"],
+            "level": config("PERF_LOG_LEVEL", default="WARNING"),
+            "propagate": False,
+        },
+    },
 }
 
 # Password validation
@@ -139,13 +268,13 @@ AUTH_PASSWORD_VALIDATORS = [
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
 
-# Configuration for cloudinary storage
-cloudinary.config(
-    cloud_name=config("cloud_name"),
-    api_key=config("cloudinary_api_key"),
-    api_secret=config("api_secret"),
-    secure=True,
-)
+# Configuration for cloudinary storage, applied by pet.apps
+CLOUDINARY = {
+    "cloud_name": config("cloud_name"),
+    "api_key": config("cloudinary_api_key"),
+    "api_secret": config("api_secret"),
+    "secure": True,
+}
 
 # Media storage setting
 DEFAULT_FILE_STORAGE = "cloudinary_storage.storage.MediaCloudinaryStorage"
@@ -166,6 +295,8 @@ STATIC_URL = "static/"
 STATIC_ROOT = BASE_DIR / "staticfiles"
 
 STATICFILES_STORAGE = "whitenoise.storage.CompressedStaticFilesStorage"
+# Content-hashed files are cached forever
+WHITENOISE_IMMUTABLE_FILE_TEST = r"/openapi/schema\.[0-9a-f]{12}\.json$"
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
@@ -175,7 +306,7 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 REST_FRAMEWORK = {
     "COERCE_DECIMAL_TO_STRING": False,
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "users.authentication.CachedJWTAuthentication",
     ),
     #    "DEFAULT_PERMISSION_CLASSES": [
     #        "rest_framework.permissions.IsAuthenticated",
@@ -201,7 +332,9 @@ DJOSER = {
 }
 
 
+# The UIs fetch the prebuilt schema (manage.py build_openapi_schema)
 SWAGGER_SETTINGS = {
+    "SPEC_URL": "schema-json",
     "SECURITY_DEFINITIONS": {
         "Bearer": {
             "type": "apiKey",
@@ -209,8 +342,9 @@ SWAGGER_SETTINGS = {
             "in": "header",
             "description": "Enter your JWT token in the format: `JWT <your_token>`",
         }
-    }
+    },
 }
+REDOC_SETTINGS = {"SPEC_URL": "schema-json"}
 
 
 EMAIL_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
@@ -220,5 +354,35 @@ EMAIL_PORT = config("EMAIL_PORT")
 EMAIL_HOST_USER = config("EMAIL_HOST_USER")
 EMAIL_HOST_PASSWORD = config("EMAIL_HOST_PASSWORD")
 
+# Apps only loaded where they are used, to keep cold starts short
+if DEBUG:
+    INSTALLED_APPS.append("debug_toolbar")
+    MIDDLEWARE.insert(
+        MIDDLEWARE.index("corsheaders.middleware.CorsMiddleware") + 1,
+        "debug_toolbar.middleware.DebugToolbarMiddleware",
+    )
+if EMAIL_BACKEND.startswith("anymail."):
+    INSTALLED_APPS.append("anymail")
+
 BACKEND_URL = config("BACKEND_URL")
+
+# SSLCOMMERZ client (adoption.gateway), shared by the requests of a worker:
+# POOL_SIZE keep-alive connections, timeouts in seconds, MAX_ATTEMPTS tries
+# per call with an exponential backoff from RETRY_DELAY, and a circuit
+# breaker refusing calls for RESET_TIMEOUT seconds after FAILURE_THRESHOLD
+# failed calls in a row. Without store credentials payments answer 503.
+PAYMENT_GATEWAY = {
+    "BASE_URL": config(
+        "SSLCOMMERZ_BASE_URL", default="https://sandbox.sslcommerz.com"
+    ),
+    "STORE_ID": config("SSLCOMMERZ_STORE_ID", default=""),
+    "STORE_PASSWORD": config("SSLCOMMERZ_STORE_PASSWORD", default=""),
+    "CONNECT_TIMEOUT": config("SSLCOMMERZ_CONNECT_TIMEOUT", default=3.05, cast=float),
+    "READ_TIMEOUT": config("SSLCOMMERZ_READ_TIMEOUT", default=10, cast=float),
+    "MAX_ATTEMPTS": 3,
+    "RETRY_DELAY": 0.25,
+    "POOL_SIZE": config("SSLCOMMERZ_POOL_SIZE", default=20, cast=int),
+    "FAILURE_THRESHOLD": 5,
+    "RESET_TIMEOUT": 30,
+}
 FRONTEND_URL = config("FRONTEND_URL")
@@ -14,36 +14,21 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+from django.conf import settings
 from django.contrib import admin
 from django.urls import path, include
-from debug_toolbar.toolbar import debug_toolbar_urls
-from .views import api_root_view
-from rest_framework import permissions
-from drf_yasg.views import get_schema_view
-from drf_yasg import openapi
-
-
-schema_view = get_schema_view(
-    openapi.Info(
-        title="fur-nest - API",
-        default_version="v1",
-        description="API Documentation for fur-nest Pet Adoption platform project",
-        terms_of_service="https://www.google.com/policies/terms/",
-        contact=openapi.Contact(email="contact@fur-nest.com"),
-        license=openapi.License(name="BSD License"),
-    ),
-    public=True,
-    permission_classes=(permissions.AllowAny,),
-)
+from .views import api_root_view, schema_json_view, schema_view
 
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("", api_root_view),
     path("api/v1/", include("api.urls"), name="api-root"),
-    path(
-        "swagger/",
-        schema_view.with_ui("swagger", cache_timeout=0),
-        name="schema-swagger-ui",
-    ),
-    path("redoc/", schema_view.with_ui("redoc", cache_timeout=0), name="schema-redoc"),
-] + debug_toolbar_urls()
+    path("openapi.json", schema_json_view, name="schema-json"),
+    path("swagger/", schema_view("swagger"), name="schema-swagger-ui"),
+    path("redoc/", schema_view("redoc"), name="schema-redoc"),
+]
+
+if settings.DEBUG:
+    from debug_toolbar.toolbar import debug_toolbar_urls
+
+    urlpatterns += debug_toolbar_urls()
@@ -1,5 +1,50 @@
+from functools import cache
+
+from django.http import HttpResponse
 from django.shortcuts import redirect
+from django.templatetags.static import static
+from django.views.decorators.csrf import csrf_exempt
+from fur_nest.schema import get_artifact_name, get_info, get_schema
 
 
 def api_root_view(request):
     return redirect("api-root")
+
+
+def schema_json_view(request):
+    """
+    The OpenAPI document: the prebuilt static artifact when there is one
+    (see build_openapi_schema), else the schema generated by this process.
+    """
+    name = get_artifact_name()
+    if name is not None:
+        return redirect(static(name))
+    return HttpResponse(get_schema(), content_type="application/json")
+
+
+@cache
+def get_schema_ui_view(renderer):
+    """Build the drf_yasg view on first use, keeping it off cold starts"""
+    from drf_yasg.views import get_schema_view
+    from rest_framework import permissions
+
+    view = get_schema_view(
+        get_info(),
+        public=True,
+        permission_classes=(permissions.AllowAny,),
+    )
+    return view.with_ui(renderer, cache_timeout=0)
+
+
+def schema_view(renderer):
+    """URL view for the ``swagger`` or ``redoc`` UI, or the raw schema"""
+
+    @csrf_exempt
+    def view(request, *args, **kwargs):
+        # The UI pages load the document from SPEC_URL; this keeps the old
+        # ?format=openapi links off per-request generation too
+        if request.GET.get("format") == "openapi":
+            return schema_json_view(request)
+        return get_schema_ui_view(renderer)(request, *args, **kwargs)
+
+    return view
@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class PetConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'pet'
+
+    def ready(self):
+        import cloudinary
+        import pet.signals  # noqa: F401
+        from django.conf import settings
+
+        cloudinary.config(**settings.CLOUDINARY)
@@ -0,0 +1,295 @@
+import codecs
+import csv
+import json
+
+from django.db import transaction
+from django.utils import timezone
+from rest_framework import serializers
+from pet.counts import reconcile_category_counts
+from pet.models import Category, Pet
+from pet.search import update_search_vectors
+from pet.serializers import PetSerializer
+
+FORMATS = ["csv", "ndjson"]
+CONTENT_TYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+# Columns of an export; imports read the writable ones and ``category_name``
+EXPORT_FIELDS = [
+    "id",
+    "name",
+    "category",
+    "category_name",
+    "breed",
+    "age",
+    "description",
+    "availability",
+    "price",
+    "rating_avg",
+    "rating_count",
+    "updated_at",
+]
+
+MAX_REPORTED_ERRORS = 1000
+
+
+class PreloadedCategoryField(serializers.PrimaryKeyRelatedField):
+    """Check category ids against the ``category_ids`` set of the context"""
+
+    def to_internal_value(self, data):
+        try:
+            pk = int(data)
+        except (TypeError, ValueError):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+        if pk not in self.context["category_ids"]:
+            self.fail("does_not_exist", pk_value=data)
+        return pk
+
+
+class PetImportSerializer(PetSerializer):
+    """PetSerializer's validation for one imported row, without queries"""
+
+    id = serializers.IntegerField(required=False, min_value=1)
+    category = PreloadedCategoryField(queryset=Category.objects.all())
+
+    class Meta(PetSerializer.Meta):
+        fields = [
+            "id",
+            "name",
+            "category",
+            "breed",
+            "age",
+            "description",
+            "availability",
+            "price",
+        ]
+
+
+IMPORT_FIELDS = [
+    field for field in PetImportSerializer.Meta.fields if field not in ("id",)
+]
+
+
+def _decode_lines(stream, invalid):
+    """
+    Decode a binary stream line by line. Lines that aren't UTF-8 are
+    decoded with replacement characters and their numbers added to
+    ``invalid``, so only their rows fail.
+    """
+    for number, line in enumerate(stream, start=1):
+        if number == 1:
+            line = line.removeprefix(codecs.BOM_UTF8)
+        try:
+            yield line.decode("utf-8")
+        except UnicodeDecodeError:
+            invalid.add(number)
+            yield line.decode("utf-8", errors="replace")
+
+
+def read_rows(stream, format):
+    """
+    Yield ``(line number, row dict)`` from a binary CSV or NDJSON stream,
+    one line at a time. Empty CSV cells are treated as missing. Rows that
+    can't be read are yielded as exceptions instead of dicts.
+    """
+    invalid = set()
+    lines = _decode_lines(stream, invalid)
+    if format == "csv":
+        reader = csv.DictReader(lines)
+        first = 1
+        try:
+            for row in reader:
+                # A quoted cell can span several lines
+                if invalid.intersection(range(first, reader.line_num + 1)):
+                    row = UnicodeError("not valid UTF-8")
+                else:
+                    row = {
+                        key: value
+                        for key, value in row.items()
+                        if key and value != ""
+                    }
+                yield reader.line_num, row
+                first = reader.line_num + 1
+        except csv.Error as error:
+            yield reader.line_num, error
+        return
+    for number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        if number in invalid:
+            row = UnicodeError("not valid UTF-8")
+        else:
+            try:
+                row = json.loads(line)
+            except ValueError as error:
+                row = error
+        yield number, row
+
+
+def _chunks(rows, size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class PetImporter:
+    """
+    Create or update pets from rows validated like PetSerializer input,
+    ``chunk_size`` rows per transaction. Rows with an ``id`` update that pet,
+    the others create one. A category is given by id (``category``) or by
+    name (``category_name``, created when missing).
+
+    Bulk writes skip the model signals, so the search vectors, category
+    counts and catalog cache are refreshed for every chunk.
+    """
+
+    def __init__(self, chunk_size=500, dry_run=False):
+        self.chunk_size = chunk_size
+        self.dry_run = dry_run
+        self.created = self.updated = self.failed = 0
+        self.errors = []
+        self.category_ids = set(Category.objects.values_list("pk", flat=True))
+        self.category_names = {}
+
+    def run(self, rows):
+        if self.dry_run:
+            with transaction.atomic():
+                self.import_chunks(rows)
+                transaction.set_rollback(True)
+        else:
+            self.import_chunks(rows)
+        return self.report()
+
+    def import_chunks(self, rows):
+        for chunk in _chunks(rows, self.chunk_size):
+            with transaction.atomic():
+                self.import_chunk(chunk)
+
+    def report(self):
+        return {
+            "created": self.created,
+            "updated": self.updated,
+            "failed": self.failed,
+            "dry_run": self.dry_run,
+            "errors": self.errors,
+        }
+
+    def error(self, line, errors):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line, "errors": errors})
+
+    def resolve_categories(self, chunk):
+        """Replace category_name by category ids, creating new categories"""
+        by_name = [
+            row
+            for _, row in chunk
+            if isinstance(row, dict)
+            and "category" not in row
+            and isinstance(row.get("category_name"), str)
+        ]
+        names = {row["category_name"] for row in by_name}
+        missing = names - self.category_names.keys()
+        if missing:
+            for category in Category.objects.filter(name__in=missing):
+                self.category_names.setdefault(category.name, category.pk)
+            new = [
+                Category(name=name)
+                for name in sorted(missing - self.category_names.keys())
+            ]
+            for category in Category.objects.bulk_create(new):
+                self.category_names[category.name] = category.pk
+                self.category_ids.add(category.pk)
+        for row in by_name:
+            row["category"] = self.category_names[row["category_name"]]
+
+    def import_chunk(self, chunk):
+        self.resolve_categories(chunk)
+        context = {"category_ids": self.category_ids}
+        valid = []
+        for line, row in chunk:
+            if not isinstance(row, dict):
+                self.error(line, {"non_field_errors": [f"Invalid row: {row}"]})
+                continue
+            serializer = PetImportSerializer(data=row, context=context)
+            if serializer.is_valid():
+                valid.append((line, serializer.validated_data))
+            else:
+                self.error(line, serializer.errors)
+
+        existing = Pet.objects.only("id", "category_id").in_bulk(
+            [data["id"] for _, data in valid if "id" in data]
+        )
+        new, changed, category_ids = [], [], set()
+        for line, data in valid:
+            values = {field: data[field] for field in IMPORT_FIELDS}
+            values["category_id"] = values.pop("category")
+            category_ids.add(values["category_id"])
+            if "id" not in data:
+                new.append(Pet(**values))
+            elif data["id"] in existing:
+                pet = existing[data["id"]]
+                category_ids.add(pet.category_id)
+                for field, value in values.items():
+                    setattr(pet, field, value)
+                changed.append(pet)
+            else:
+                self.error(line, {"id": [f"No pet with id {data['id']}."]})
+
+        fields = [
+            "category_id" if field == "category" else field for field in IMPORT_FIELDS
+        ]
+        # bulk_update() doesn't apply auto_now
+        now = timezone.now()
+        for pet in changed:
+            pet.updated_at = now
+        created = Pet.objects.bulk_create(new)
+        Pet.objects.bulk_update(changed, [*fields, "updated_at"])
+        self.created += len(created)
+        self.updated += len(changed)
+
+        pks = [pet.pk for pet in created + changed]
+        if pks:
+            update_search_vectors(Pet.objects.filter(pk__in=pks))
+            reconcile_category_counts(category_ids)
+
+
+def export_rows(queryset=None, chunk_size=2000):
+    """Yield the EXPORT_FIELDS of every pet as dicts, ``chunk_size`` at a time"""
+    if queryset is None:
+        queryset = Pet.objects.all()
+    lookups = {
+        field: "category__name" if field == "category_name" else field
+        for field in EXPORT_FIELDS
+    }
+    rows = queryset.order_by("pk").values(*lookups.values()).iterator(chunk_size)
+    for row in rows:
+        row = {field: row[lookup] for field, lookup in lookups.items()}
+        # Decimals as strings so NDJSON keeps them exact
+        row["price"] = str(row["price"])
+        row["rating_avg"] = str(row["rating_avg"])
+        row["updated_at"] = row["updated_at"].isoformat()
+        yield row
+
+
+class _Echo:
+    """File-like object handing back what csv.writer writes to it"""
+
+    def write(self, value):
+        return value
+
+
+def export_lines(format, rows):
+    """Encode export rows as CSV or NDJSON lines"""
+    if format == "csv":
+        writer = csv.DictWriter(_Echo(), fieldnames=EXPORT_FIELDS)
+        yield writer.writeheader()
+        for row in rows:
+            yield writer.writerow(row)
+        return
+    for row in rows:
+        yield json.dumps(row) + "\n"
@@ -0,0 +1,125 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Count, Max
+from django.utils.http import http_date, parse_etags, parse_http_date_safe
+from rest_framework import status
+from rest_framework.response import Response
+
+
+def get_catalog_cache():
+    return caches[settings.CATALOG_CACHE.get("ALIAS", "default")]
+
+
+def get_fingerprint(queryset):
+    """
+    The number of rows in ``queryset`` and when the last of them changed
+    (None when empty): any insert, delete or write of ``updated_at`` changes
+    it, whichever process made it.
+    """
+    found = queryset.order_by().aggregate(
+        count=Count("pk"), last_modified=Max("updated_at")
+    )
+    return found["count"], found["last_modified"]
+
+
+def not_modified(request, etag, last_modified):
+    """
+    Whether the request's If-None-Match (or, without it, If-Modified-Since)
+    header shows the client already has the current representation.
+    """
+    if_none_match = request.headers.get("If-None-Match")
+    if if_none_match:
+        tags = parse_etags(if_none_match)
+        # Weak comparison, as GZipMiddleware weakens the ETags it compresses
+        return "*" in tags or etag.removeprefix("W/") in {
+            tag.removeprefix("W/") for tag in tags
+        }
+    if last_modified is None:
+        return False
+    if_modified_since = parse_http_date_safe(
+        request.headers.get("If-Modified-Since", "")
+    )
+    return if_modified_since is not None and last_modified <= if_modified_since
+
+
+class CatalogCacheMixin:
+    """
+    Serve ``list`` and ``retrieve`` from the catalog cache.
+
+    Entries are keyed by the request URL, the allowed query parameters
+    (sorted) and the fingerprint of the rows the response is built from
+    (``get_cache_queryset()``, see ``get_fingerprint()``), so any write,
+    made by whichever process, leads the next request to a new entry.
+
+    Responses carry the same fingerprint as ETag and the time of the last
+    change as Last-Modified. Conditional requests that still match are
+    answered with 304 before the cache or the rest of the database is read.
+    """
+
+    cache_namespace = None
+    cache_query_params = ["page"]
+
+    def get_cache_query_params(self):
+        allowed = set(self.cache_query_params)
+        filterset_class = getattr(self, "filterset_class", None)
+        if filterset_class is not None:
+            allowed.update(filterset_class.base_filters)
+        return allowed
+
+    def get_cache_queryset(self):
+        """The rows the response is built from, for get_fingerprint()"""
+        queryset = self.get_queryset()
+        if self.action == "retrieve":
+            lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+            queryset = queryset.filter(
+                **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+            )
+        return queryset
+
+    def get_cache_digest(self, request, state):
+        allowed = self.get_cache_query_params()
+        params = sorted(
+            (key, sorted(values))
+            for key, values in request.query_params.lists()
+            if key in allowed
+        )
+        raw = repr((request.build_absolute_uri(request.path), params, state))
+        return hashlib.md5(raw.encode()).hexdigest()
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        fingerprint = get_fingerprint(self.get_cache_queryset())
+        digest = self.get_cache_digest(request, fingerprint)
+        # The same data renders differently for the browsable API
+        etag = f'W/"{digest}-{request.accepted_renderer.format}"'
+        validators = {"ETag": etag}
+        last_modified = fingerprint[1]
+        if last_modified is not None:
+            # HTTP dates have a resolution of one second
+            last_modified = int(last_modified.timestamp())
+            validators["Last-Modified"] = http_date(last_modified)
+        if not_modified(request, etag, last_modified):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=validators)
+
+        key = f"catalog:{self.cache_namespace}:{self.action}:{digest}"
+        cache = get_catalog_cache()
+        data = cache.get(key)
+        if data is not None:
+            response = Response(data, headers=validators)
+            response["X-Cache"] = "HIT"
+            return response
+
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(key, response.data, settings.CATALOG_CACHE.get("TIMEOUT", 300))
+            response["X-Cache"] = "MISS"
+            for header, value in validators.items():
+                response[header] = value
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(super().retrieve, request, *args, **kwargs)
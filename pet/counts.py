@@ -0,0 +1,67 @@
+from collections import Counter
+
+from django.db.models import Count, F, Q
+from django.db.models.functions import Now
+from django.utils import timezone
+from pet.models import Category, Pet
+
+
+def apply_category_delta(category_id, total_delta, available_delta):
+    """
+    Adjust the denormalized pet counts of a category in a single UPDATE.
+    A decrement that would take a count below zero means the counts drifted
+    (e.g. pets created with bulk_create()), so they are recomputed instead.
+    """
+    if not total_delta and not available_delta:
+        return 0
+    guard = {}
+    if total_delta < 0:
+        guard["pet_count__gte"] = -total_delta
+    if available_delta < 0:
+        guard["available_pet_count__gte"] = -available_delta
+    updated = Category.objects.filter(pk=category_id, **guard).update(
+        pet_count=F("pet_count") + total_delta,
+        available_pet_count=F("available_pet_count") + available_delta,
+        updated_at=Now(),
+    )
+    if not updated and guard:
+        reconcile_category_counts([category_id])
+    return updated
+
+
+def apply_adoption_deltas(pets):
+    """Take adopted pets out of the available count of their categories"""
+    for category_id, adopted in Counter(pet.category_id for pet in pets).items():
+        apply_category_delta(category_id, 0, -adopted)
+
+
+def reconcile_category_counts(category_ids):
+    """
+    Recompute the pet counts of the given categories from the pet table and
+    save the ones that drifted. Returns the number of categories fixed.
+    """
+    counts = {
+        row["category_id"]: row
+        for row in Pet.objects.filter(category_id__in=category_ids)
+        .order_by()
+        .values("category_id")
+        .annotate(total=Count("id"), available=Count("id", filter=Q(availability=True)))
+    }
+    stale = []
+    for category in Category.objects.filter(pk__in=category_ids).only(
+        "id", "pet_count", "available_pet_count"
+    ):
+        row = counts.get(category.pk, {"total": 0, "available": 0})
+        if (category.pet_count, category.available_pet_count) != (
+            row["total"],
+            row["available"],
+        ):
+            category.pet_count = row["total"]
+            category.available_pet_count = row["available"]
+            category.updated_at = timezone.now()
+            stale.append(category)
+
+    Category.objects.bulk_update(
+        stale, ["pet_count", "available_pet_count", "updated_at"]
+    )
+    return len(stale)
@@ -5,4 +5,12 @@ from pet.models import Pet
 class PetFilter(FilterSet):
     class Meta:
         model = Pet
-        fields = {"category": ["exact"], "price": ["gt", "lt"]}
+        fields = {
+            "category": ["exact", "in"],
+            "availability": ["exact"],
+            "age": ["gte", "lte"],
+            "breed": ["exact", "startswith"],
+            "price": ["gt", "lt", "gte", "lte"],
+            "rating_avg": ["gte", "lte"],
+            "rating_count": ["gte"],
+        }
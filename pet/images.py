@@ -0,0 +1,82 @@
+from cloudinary import CloudinaryResource
+from django.utils import timezone
+
+# Cloudinary transformations precomputed for every PetImage, by URL field.
+# Changing them requires `manage.py refresh_pet_image_urls --all`.
+VARIANTS = {
+    "thumbnail_url": {
+        "width": 320,
+        "height": 320,
+        "crop": "fill",
+        "gravity": "auto",
+        "quality": "auto",
+        "fetch_format": "auto",
+    },
+    "medium_url": {
+        "width": 960,
+        "crop": "limit",
+        "quality": "auto",
+        "fetch_format": "auto",
+    },
+}
+
+URL_FIELDS = ["url", *VARIANTS]
+
+
+def image_urls(image):
+    """
+    Return the delivery URL of a PetImage.image value and of its VARIANTS,
+    keyed by PetImage field name. Empty when there is no image.
+    """
+    from pet.models import PetImage
+
+    if isinstance(image, str):
+        image = PetImage._meta.get_field("image").to_python(image)
+    if not isinstance(image, CloudinaryResource):
+        return dict.fromkeys(URL_FIELDS, "")
+    urls = {"url": image.url}
+    for field, transformation in VARIANTS.items():
+        urls[field] = image.build_url(**transformation)
+    return urls
+
+
+def set_image_urls(pet_image):
+    """Fill the URL fields of ``pet_image`` and return the changed ones"""
+    changed = []
+    for field, url in image_urls(pet_image.image).items():
+        if getattr(pet_image, field) != url:
+            setattr(pet_image, field, url)
+            changed.append(field)
+    return changed
+
+
+def save_image_urls(pet_images):
+    """Store the URL fields of ``pet_images`` and touch their pets"""
+    from pet.models import Pet, PetImage
+
+    # bulk_update() doesn't apply auto_now
+    now = timezone.now()
+    for pet_image in pet_images:
+        pet_image.updated_at = now
+    updated = PetImage.all_objects.bulk_update(
+        pet_images, [*URL_FIELDS, "updated_at"]
+    )
+    Pet.objects.filter(pk__in={image.pet_id for image in pet_images}).update(
+        updated_at=now
+    )
+    return updated
+
+
+def refresh_image_urls(queryset, batch_size=1000):
+    """Recompute the URL fields of the images in ``queryset``, in batches"""
+    updated = 0
+    batch = []
+    for pet_image in queryset.order_by("pk").iterator(chunk_size=batch_size):
+        if set_image_urls(pet_image):
+            batch.append(pet_image)
+        if len(batch) >= batch_size:
+            updated += save_image_urls(batch)
+            batch = []
+    if batch:
+        updated += save_image_urls(batch)
+    return updated
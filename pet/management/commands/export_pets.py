@@ -0,0 +1,22 @@
+import sys
+
+from django.core.management.base import BaseCommand
+from pet import bulk
+
+
+class Command(BaseCommand):
+    help = "Stream every pet to a CSV or NDJSON file (stdout by default)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--format", choices=bulk.FORMATS, default="csv")
+        parser.add_argument("--output")
+        parser.add_argument("--chunk-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        rows = bulk.export_rows(chunk_size=options["chunk_size"])
+        lines = bulk.export_lines(options["format"], rows)
+        if options["output"] is None:
+            sys.stdout.writelines(lines)
+            return
+        with open(options["output"], "w", newline="", encoding="utf-8") as output:
+            output.writelines(lines)
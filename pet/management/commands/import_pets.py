@@ -0,0 +1,38 @@
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from pet import bulk
+
+
+class Command(BaseCommand):
+    help = (
+        "Create or update pets from a CSV or NDJSON file (see pet.bulk), "
+        "validated like the API and written in chunks"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--format", choices=bulk.FORMATS)
+        parser.add_argument("--chunk-size", type=int, default=500)
+        parser.add_argument("--dry-run", action="store_true")
+
+    def handle(self, *args, **options):
+        path = Path(options["path"])
+        import_format = options["format"] or path.suffix.lstrip(".").lower()
+        if import_format not in bulk.FORMATS:
+            raise CommandError(f"Pass --format, one of {', '.join(bulk.FORMATS)}")
+
+        importer = bulk.PetImporter(options["chunk_size"], options["dry_run"])
+        with path.open("rb") as stream:
+            report = importer.run(bulk.read_rows(stream, import_format))
+
+        for error in report["errors"]:
+            self.stderr.write(f"line {error['line']}: {json.dumps(error['errors'])}")
+        summary = (
+            f"{report['created']} created, {report['updated']} updated, "
+            f"{report['failed']} failed" + (" (dry run)" if options["dry_run"] else "")
+        )
+        if report["failed"]:
+            raise CommandError(summary)
+        self.stdout.write(self.style.SUCCESS(summary))
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+from pet.models import Pet
+from pet.search import supports_full_text, update_search_vectors
+
+
+class Command(BaseCommand):
+    help = "Recompute the full-text search vector of every pet in batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        queryset = Pet.objects.all()
+        if not supports_full_text(queryset):
+            self.stdout.write(
+                "Full-text search needs PostgreSQL; the icontains fallback "
+                "does not use an index, nothing to rebuild."
+            )
+            return
+
+        batch_size = options["batch_size"]
+        last_id = 0
+        updated = 0
+        while True:
+            ids = list(
+                queryset.filter(pk__gt=last_id)
+                .order_by("pk")
+                .values_list("pk", flat=True)[:batch_size]
+            )
+            if not ids:
+                break
+            updated += update_search_vectors(Pet.objects.filter(pk__in=ids))
+            last_id = ids[-1]
+            self.stdout.write(f"Indexed {updated} pets")
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Rebuilt search index for {updated} pets")
+        )
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+from pet.models import Pet
+from pet.ratings import reconcile_ratings
+
+
+class Command(BaseCommand):
+    help = "Recompute Pet.rating_avg/rating_count from reviews in batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        last_id = 0
+        checked = fixed = 0
+        while True:
+            ids = list(
+                Pet.objects.filter(pk__gt=last_id)
+                .order_by("pk")
+                .values_list("pk", flat=True)[:batch_size]
+            )
+            if not ids:
+                break
+            fixed += reconcile_ratings(ids)
+            checked += len(ids)
+            last_id = ids[-1]
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Checked {checked} pets, fixed {fixed} rating aggregates"
+            )
+        )
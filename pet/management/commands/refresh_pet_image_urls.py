@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from pet.images import refresh_image_urls
+from pet.models import PetImage
+
+
+class Command(BaseCommand):
+    help = (
+        "Store the delivery and variant URLs of pet images that miss them, or "
+        "of all images with --all (after changing pet.images.VARIANTS or the "
+        "Cloudinary account)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--all", action="store_true")
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        queryset = PetImage.objects.all()
+        if not options["all"]:
+            queryset = queryset.filter(thumbnail_url="")
+        updated = refresh_image_urls(queryset, options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Updated the URLs of {updated} images"))
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+from django.db.models.functions import Now
+from pet.models import PetImage
+from pet.uploads import upload
+
+
+class Command(BaseCommand):
+    help = (
+        "Upload the staged pet images that are still pending or failed, e.g. "
+        "after a restart dropped the upload queue"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--reset-uploading",
+            action="store_true",
+            help="Also retry images left 'uploading' by a crashed worker; only "
+            "use it while no upload workers are running",
+        )
+
+    def handle(self, *args, **options):
+        if options["reset_uploading"]:
+            PetImage.all_objects.filter(status=PetImage.UPLOADING).update(
+                status=PetImage.PENDING, updated_at=Now()
+            )
+        ids = PetImage.all_objects.filter(
+            status__in=[PetImage.PENDING, PetImage.FAILED]
+        ).values_list("pk", flat=True)
+        results = {}
+        for image_id in ids:
+            result = upload(image_id)
+            results[result] = results.get(result, 0) + 1
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Uploaded {results.get(PetImage.READY, 0)} images, "
+                f"{results.get(PetImage.FAILED, 0)} failed"
+            )
+        )
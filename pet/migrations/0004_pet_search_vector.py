@@ -0,0 +1,53 @@
+# Generated by Django 5.2.4 on 2026-10-17 03:53
+
+import django.contrib.postgres.search
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+from django.db.models import OuterRef, Subquery
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(
+        "CREATE INDEX pet_pet_search_vector_gin ON pet_pet USING gin (search_vector)"
+    )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("DROP INDEX IF EXISTS pet_pet_search_vector_gin")
+
+
+def populate_search_vector(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    Pet = apps.get_model("pet", "Pet")
+    Category = apps.get_model("pet", "Category")
+    category_name = Subquery(
+        Category.objects.filter(pk=OuterRef("category_id")).values("name")[:1]
+    )
+    Pet.objects.update(
+        search_vector=SearchVector("name", weight="A", config="english")
+        + SearchVector("breed", weight="B", config="english")
+        + SearchVector(category_name, weight="C", config="english")
+        + SearchVector("description", weight="D", config="english")
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pet', '0003_petimage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pet',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+        migrations.RunPython(populate_search_vector, migrations.RunPython.noop),
+    ]
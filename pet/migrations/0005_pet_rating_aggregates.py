@@ -0,0 +1,52 @@
+# Generated by Django 5.2.4 on 2026-10-17 03:54
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def populate_rating_aggregates(apps, schema_editor):
+    Pet = apps.get_model("pet", "Pet")
+    Review = apps.get_model("pet", "Review")
+    pets = []
+    for row in (
+        Review.objects.order_by()
+        .values("pet_id")
+        .annotate(count=Count("id"), total=Sum("ratings"))
+    ):
+        pets.append(
+            Pet(
+                pk=row["pet_id"],
+                rating_count=row["count"],
+                rating_total=row["total"],
+                rating_avg=round(row["total"] / row["count"], 2),
+            )
+        )
+    Pet.objects.bulk_update(
+        pets, ["rating_count", "rating_total", "rating_avg"], batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pet', '0004_pet_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pet',
+            name='rating_avg',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=3),
+        ),
+        migrations.AddField(
+            model_name='pet',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='pet',
+            name='rating_total',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(populate_rating_aggregates, migrations.RunPython.noop),
+    ]
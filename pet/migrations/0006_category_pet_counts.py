@@ -0,0 +1,43 @@
+# Generated by Django 5.2.4 on 2026-10-17 04:04
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def populate_category_counts(apps, schema_editor):
+    Category = apps.get_model("pet", "Category")
+    Pet = apps.get_model("pet", "Pet")
+    categories = [
+        Category(
+            pk=row["category_id"],
+            pet_count=row["total"],
+            available_pet_count=row["available"],
+        )
+        for row in Pet.objects.order_by()
+        .values("category_id")
+        .annotate(total=Count("id"), available=Count("id", filter=Q(availability=True)))
+    ]
+    Category.objects.bulk_update(
+        categories, ["pet_count", "available_pet_count"], batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pet', '0005_pet_rating_aggregates'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='available_pet_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='pet_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(populate_category_counts, migrations.RunPython.noop),
+    ]
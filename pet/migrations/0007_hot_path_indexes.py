@@ -0,0 +1,29 @@
+# Generated by Django 5.2.4 on 2026-10-17 04:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pet', '0006_category_pet_counts'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='pet',
+            index=models.Index(fields=['category', 'price'], name='pet_category_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pet',
+            index=models.Index(fields=['price', 'id'], name='pet_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pet',
+            index=models.Index(condition=models.Q(('availability', True)), fields=['category', '-id'], name='pet_available_category_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pet',
+            index=models.Index(condition=models.Q(('availability', True)), fields=['price', 'id'], name='pet_available_price_idx'),
+        ),
+    ]
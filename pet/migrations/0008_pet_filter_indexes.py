@@ -0,0 +1,31 @@
+# Generated by Django 5.2.4 on 2026-10-17 04:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pet', '0007_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='pet',
+            name='age',
+            field=models.PositiveIntegerField(db_index=True),
+        ),
+        migrations.AlterField(
+            model_name='pet',
+            name='breed',
+            field=models.CharField(db_index=True, max_length=200),
+        ),
+        migrations.AddIndex(
+            model_name='pet',
+            index=models.Index(fields=['rating_avg', 'id'], name='pet_rating_avg_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pet',
+            index=models.Index(fields=['rating_count', 'id'], name='pet_rating_count_idx'),
+        ),
+    ]
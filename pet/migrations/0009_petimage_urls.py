@@ -0,0 +1,75 @@
+# Generated by Django 5.2.4 on 2026-10-17 04:16
+
+import cloudinary
+from cloudinary import CloudinaryResource
+from django.db import migrations, models
+
+# Frozen copy of pet.images.VARIANTS when the URL fields were added. Later
+# variants are applied with `manage.py refresh_pet_image_urls --all`.
+VARIANTS = {
+    "thumbnail_url": {
+        "width": 320,
+        "height": 320,
+        "crop": "fill",
+        "gravity": "auto",
+        "quality": "auto",
+        "fetch_format": "auto",
+    },
+    "medium_url": {
+        "width": 960,
+        "crop": "limit",
+        "quality": "auto",
+        "fetch_format": "auto",
+    },
+}
+
+
+def populate_image_urls(apps, schema_editor):
+    # Without a cloud name no URL can be built; the serializers fall back to
+    # building them per request until refresh_pet_image_urls is run.
+    if not cloudinary.config().cloud_name:
+        return
+    PetImage = apps.get_model("pet", "PetImage")
+    image_field = PetImage._meta.get_field("image")
+    batch = []
+    for pet_image in PetImage.objects.order_by("pk").iterator(chunk_size=1000):
+        image = pet_image.image
+        if isinstance(image, str):
+            image = image_field.to_python(image)
+        if not isinstance(image, CloudinaryResource):
+            continue
+        pet_image.url = image.url
+        for field, transformation in VARIANTS.items():
+            setattr(pet_image, field, image.build_url(**transformation))
+        batch.append(pet_image)
+        if len(batch) >= 1000:
+            PetImage.objects.bulk_update(batch, ["url", *VARIANTS])
+            batch = []
+    if batch:
+        PetImage.objects.bulk_update(batch, ["url", *VARIANTS])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pet', '0008_pet_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='petimage',
+            name='medium_url',
+            field=models.URLField(blank=True, editable=False, max_length=500),
+        ),
+        migrations.AddField(
+            model_name='petimage',
+            name='thumbnail_url',
+            field=models.URLField(blank=True, editable=False, max_length=500),
+        ),
+        migrations.AddField(
+            model_name='petimage',
+            name='url',
+            field=models.URLField(blank=True, editable=False, max_length=500),
+        ),
+        migrations.RunPython(populate_image_urls, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.4 on 2026-10-17 04:18
+
+import cloudinary.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pet', '0009_petimage_urls'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='petimage',
+            name='attempts',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='petimage',
+            name='error',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='petimage',
+            name='staged_file',
+            field=models.CharField(blank=True, editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='petimage',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('uploading', 'Uploading'), ('ready', 'Ready'), ('failed', 'Failed')], default='ready', max_length=10),
+        ),
+        migrations.AlterField(
+            model_name='petimage',
+            name='image',
+            field=cloudinary.models.CloudinaryField(blank=True, max_length=255, null=True, verbose_name='image'),
+        ),
+    ]
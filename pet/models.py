@@ -1,9 +1,11 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Count, Sum
 from django.conf import settings
 from django.core.validators import (
     MinValueValidator,
     MaxValueValidator,
 )
+from django.contrib.postgres.search import SearchVectorField
 from cloudinary.models import CloudinaryField
 
 # Create your models here.
@@ -12,6 +14,9 @@ from cloudinary.models import CloudinaryField
 class Category(models.Model):
     name = models.CharField(max_length=100)
     description = models.TextField(blank=True, null=True)
+    pet_count = models.PositiveIntegerField(default=0, editable=False)
+    available_pet_count = models.PositiveIntegerField(default=0, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = [
@@ -27,24 +32,95 @@ class Pet(models.Model):
     category = models.ForeignKey(
         Category, on_delete=models.CASCADE, related_name="pets"
     )
-    breed = models.CharField(max_length=200)
-    age = models.PositiveIntegerField()
+    breed = models.CharField(max_length=200, db_index=True)
+    age = models.PositiveIntegerField(db_index=True)
     description = models.TextField()
     availability = models.BooleanField()
     price = models.DecimalField(max_digits=10, decimal_places=2)
+    search_vector = SearchVectorField(null=True, editable=False)
+    rating_avg = models.DecimalField(
+        max_digits=3, decimal_places=2, default=0, editable=False
+    )
+    rating_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_total = models.PositiveIntegerField(default=0, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = [
             "-id",
         ]
+        indexes = [
+            models.Index(fields=["category", "price"], name="pet_category_price_idx"),
+            models.Index(fields=["price", "id"], name="pet_price_idx"),
+            models.Index(fields=["rating_avg", "id"], name="pet_rating_avg_idx"),
+            models.Index(fields=["rating_count", "id"], name="pet_rating_count_idx"),
+            # The storefront only lists available pets, keep those indexes small.
+            models.Index(
+                fields=["category", "-id"],
+                condition=models.Q(availability=True),
+                name="pet_available_category_idx",
+            ),
+            models.Index(
+                fields=["price", "id"],
+                condition=models.Q(availability=True),
+                name="pet_available_price_idx",
+            ),
+        ]
 
     def __str__(self):
         return self.name
 
 
+class ReadyPetImageManager(models.Manager):
+    def get_queryset(self):
+        return super().get_queryset().filter(status=PetImage.READY)
+
+
 class PetImage(models.Model):
+    PENDING = "pending"
+    UPLOADING = "uploading"
+    READY = "ready"
+    FAILED = "failed"
+    STATUS_CHOICES = [
+        (PENDING, "Pending"),
+        (UPLOADING, "Uploading"),
+        (READY, "Ready"),
+        (FAILED, "Failed"),
+    ]
+
     pet = models.ForeignKey(Pet, on_delete=models.CASCADE, related_name="images")
-    image = CloudinaryField("image")
+    image = CloudinaryField("image", blank=True, null=True)
+    # Delivery URLs resolved once the image is uploaded, see pet.images
+    url = models.URLField(max_length=500, blank=True, editable=False)
+    thumbnail_url = models.URLField(max_length=500, blank=True, editable=False)
+    medium_url = models.URLField(max_length=500, blank=True, editable=False)
+    # Background uploads, see pet.uploads
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=READY)
+    staged_file = models.CharField(max_length=255, blank=True, editable=False)
+    attempts = models.PositiveSmallIntegerField(default=0, editable=False)
+    error = models.TextField(blank=True, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    # Images still being uploaded are hidden from pets and the catalog
+    objects = ReadyPetImageManager()
+    all_objects = models.Manager()
+
+
+class ReviewQuerySet(models.QuerySet):
+    def delete(self):
+        """Bulk delete reviews and take them out of the pets' rating aggregates"""
+        from pet.ratings import apply_rating_delta
+
+        with transaction.atomic(using=self.db):
+            removed = list(
+                self.order_by()
+                .values("pet_id")
+                .annotate(count=Count("id"), total=Sum("ratings"))
+            )
+            result = super().delete()
+            for row in removed:
+                apply_rating_delta(row["pet_id"], -row["count"], -row["total"])
+        return result
 
 
 class Review(models.Model):
@@ -57,5 +133,7 @@ class Review(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = ReviewQuerySet.as_manager()
+
     def __str__(self):
         return f"Review by {self.user.first_name} on {self.pet.name}"
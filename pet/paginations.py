@@ -1,5 +1,237 @@
-from rest_framework.pagination import PageNumberPagination
+import base64
+import binascii
+import json
+from collections import OrderedDict
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db import connections
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.filters import OrderingFilter
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
 
 
 class DefaultPagination(PageNumberPagination):
     page_size = 10
+
+
+def approximate_count(queryset):
+    """
+    Estimate the number of rows in a queryset without running COUNT(*).
+    On PostgreSQL the planner estimate is used, other backends fall back to
+    an exact count.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql":
+        return queryset.count()
+
+    sql, params = queryset.order_by().values("pk").query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination that seeks on (ordering field, id) instead of using
+    OFFSET, so deep pages cost the same as the first one and no COUNT(*)
+    is run unless an approximate total is requested with ``?with_total=true``.
+
+    The ordering comes from the view's OrderingFilter, else from the first
+    term the filters ordered the queryset by (e.g. ``-rank`` for searches)
+    or ``-id``; ``id`` is always used as the tie-breaker.
+    """
+
+    page_size = 10
+    cursor_query_param = "cursor"
+    total_query_param = "with_total"
+    page_query_param = "page"
+    default_ordering = "-id"
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = remove_query_param(
+            request.build_absolute_uri(), self.page_query_param
+        )
+        self.field, self.descending = self.get_ordering(request, queryset, view)
+
+        self.total = None
+        with_total = request.query_params.get(self.total_query_param, "")
+        if with_total.lower() in ("1", "true"):
+            self.total = approximate_count(queryset)
+
+        cursor = self.decode_cursor(request, queryset)
+        reverse = bool(cursor and cursor["r"])
+        if cursor is not None:
+            queryset = queryset.filter(self.seek(cursor["v"], cursor["id"], reverse))
+
+        results = list(
+            queryset.order_by(*self.get_order_by(reverse))[: self.page_size + 1]
+        )
+        has_more = len(results) > self.page_size
+        results = results[: self.page_size]
+        if reverse:
+            results.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, cursor is not None
+
+        self.page = results
+        return results
+
+    def get_paginated_response(self, data):
+        response = OrderedDict(
+            [("next", self.get_next_link()), ("previous", self.get_previous_link())]
+        )
+        if self.total is not None:
+            response["count"] = self.total
+        response["results"] = data
+        return Response(response)
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "count": {"type": "integer"},
+                "results": schema,
+            },
+        }
+
+    def get_ordering(self, request, queryset, view):
+        ordering = None
+        for backend in getattr(view, "filter_backends", []):
+            if issubclass(backend, OrderingFilter):
+                ordering = backend().get_ordering(request, queryset, view)
+                break
+        if not ordering:
+            ordering = [
+                term for term in queryset.query.order_by if isinstance(term, str)
+            ]
+        term = ordering[0] if ordering else self.default_ordering
+        descending = term.startswith("-")
+        field = term.lstrip("-")
+        if field == "id":
+            field = "pk"
+        return field, descending
+
+    def get_order_by(self, reverse=False):
+        descending = self.descending != reverse
+        prefix = "-" if descending else ""
+        if self.field == "pk":
+            return [f"{prefix}pk"]
+        return [f"{prefix}{self.field}", f"{prefix}pk"]
+
+    def seek(self, value, pk, reverse=False):
+        lookup = "lt" if self.descending != reverse else "gt"
+        if self.field == "pk":
+            return Q(**{f"pk__{lookup}": pk})
+        return Q(**{f"{self.field}__{lookup}": value}) | Q(
+            **{self.field: value, f"pk__{lookup}": pk}
+        )
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def ordering_key(self):
+        return f"{'-' if self.descending else ''}{self.field}"
+
+    def encode_cursor(self, obj, reverse):
+        # Pages hold model instances or, on the fast list path, values() rows.
+        if isinstance(obj, dict):
+            pk, value = obj["pk"], obj[self.field]
+        else:
+            pk, value = obj.pk, getattr(obj, self.field)
+        if self.field == "pk":
+            value = None
+        elif not isinstance(value, (int, float, bool, type(None))):
+            value = str(value)
+        payload = {
+            "o": self.ordering_key(),
+            "v": value,
+            "id": pk,
+            "r": int(reverse),
+        }
+        token = base64.urlsafe_b64encode(
+            json.dumps(payload, separators=(",", ":")).encode()
+        ).decode()
+        return replace_query_param(self.base_url, self.cursor_query_param, token)
+
+    def decode_cursor(self, request, queryset):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(token.encode()).decode())
+            ordering = payload["o"]
+            if ordering != self.ordering_key():
+                raise NotFound(self.invalid_cursor_message)
+            cursor = {
+                "v": self.to_python(queryset, payload["v"]),
+                "id": int(payload["id"]),
+                "r": int(payload["r"]),
+            }
+        except (
+            TypeError,
+            ValueError,
+            KeyError,
+            binascii.Error,
+            UnicodeDecodeError,
+            ValidationError,
+        ):
+            raise NotFound(self.invalid_cursor_message)
+        return cursor
+
+    def to_python(self, queryset, value):
+        """Coerce a cursor value like the ordering field (or annotation) would"""
+        if self.field == "pk":
+            return None
+        try:
+            field = queryset.model._meta.get_field(self.field)
+        except FieldDoesNotExist:
+            if self.field not in queryset.query.annotations:
+                return value
+            field = queryset.query.annotations[self.field].output_field
+        if value is None and not field.null:
+            raise ValueError("null cursor value")
+        if isinstance(value, (dict, list)):
+            raise TypeError("non-scalar cursor value")
+        return field.to_python(value)
+
+
+class PetPagination(DefaultPagination):
+    """
+    Page-number pagination by default; switches to keyset pagination when
+    the ``cursor`` query parameter is present (``?cursor=`` for the first
+    page).
+    """
+
+    keyset_class = KeysetPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if self.keyset_class.cursor_query_param in request.query_params:
+            self.keyset = self.keyset_class()
+            self.keyset.page_size = self.page_size
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
@@ -0,0 +1,123 @@
+import io
+import logging
+import threading
+from concurrent.futures import CancelledError, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+logger = logging.getLogger(__name__)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+CONTENT_TYPES = {"WEBP": "image/webp", "JPEG": "image/jpeg"}
+EXTENSIONS = {"WEBP": ".webp", "JPEG": ".jpg"}
+# Ends the stem of processed files, which retried uploads don't process again
+PROCESSED_MARK = "-processed"
+
+
+def process_image(data, max_dimension, image_format, quality, max_pixels):
+    """
+    Validate an encoded image, apply and drop its EXIF orientation and
+    metadata, fit it within ``max_dimension`` pixels and re-encode it.
+    Returns the new bytes. Runs in the processing pool, so it only takes
+    plain arguments and never touches Django settings.
+    """
+    with Image.open(io.BytesIO(data)) as image:
+        if image.width * image.height > max_pixels:
+            raise ValueError(f"Image is larger than {max_pixels} pixels")
+        image.verify()
+    with Image.open(io.BytesIO(data)) as image:
+        # Let JPEG decoding downscale by a power of two on the way in
+        image.draft("RGB", (max_dimension, max_dimension))
+        image = ImageOps.exif_transpose(image)
+        if image_format == "JPEG" or image.mode not in ("RGB", "RGBA"):
+            alpha = image_format == "WEBP" and image.has_transparency_data
+            image = image.convert("RGBA" if alpha else "RGB")
+        image.thumbnail((max_dimension, max_dimension), Image.Resampling.LANCZOS)
+        output = io.BytesIO()
+        # Saving without exif= drops the metadata
+        image.save(output, image_format, quality=quality, optimize=True)
+    return output.getvalue()
+
+
+def get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=settings.PET_IMAGE_PROCESSING["WORKERS"]
+            )
+        return _pool
+
+
+def discard_pool(pool):
+    """Drop a broken pool so that the next get_pool() starts a new one"""
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def process(data):
+    """
+    Run process_image() with the configured options in the process pool.
+    A worker dying (e.g. killed for memory) breaks the whole pool: it is
+    replaced and the image tried once more before being rejected. The same
+    goes for a pool that another thread shut down as broken meanwhile.
+    """
+    options = settings.PET_IMAGE_PROCESSING
+    args = (
+        data,
+        options["MAX_DIMENSION"],
+        options["FORMAT"],
+        options["QUALITY"],
+        options["MAX_PIXELS"],
+    )
+    try:
+        for _ in range(2):
+            pool = get_pool()
+            try:
+                future = pool.submit(process_image, *args)
+            except RuntimeError:
+                # Shut down by discard_pool() in another thread (or broken)
+                discard_pool(pool)
+                continue
+            try:
+                return future.result()
+            except BrokenProcessPool:
+                logger.warning("Image processing pool broke, starting a new one")
+                discard_pool(pool)
+            except CancelledError:
+                # Queued when another thread's discard_pool() shut the pool down
+                pass
+        raise ValidationError("The image could not be processed.")
+    except (Image.DecompressionBombError, ValueError) as error:
+        raise ValidationError(str(error)) from error
+    except (UnidentifiedImageError, OSError) as error:
+        raise ValidationError(
+            "Upload a valid image. The file is not an image or is corrupted."
+        ) from error
+
+
+def process_path(path):
+    """
+    Replace a staged image by its processed version and return the new
+    path; files processed before (by a failed upload) are kept as they are.
+    """
+    path = Path(path)
+    options = settings.PET_IMAGE_PROCESSING
+    if not options["ENABLED"] or path.stem.endswith(PROCESSED_MARK):
+        return path
+    data = process(path.read_bytes())
+    target = path.with_name(
+        f"{path.stem}{PROCESSED_MARK}{EXTENSIONS[options['FORMAT']]}"
+    )
+    target.write_bytes(data)
+    path.unlink()
+    return target
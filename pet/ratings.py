@@ -0,0 +1,71 @@
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.db.models import Count, DecimalField, F, FloatField, Sum, Value
+from django.db.models.functions import Cast, Coalesce, Now, NullIf, Round
+from django.utils import timezone
+from pet.models import Pet, Review
+
+
+RATING_AVG = DecimalField(max_digits=3, decimal_places=2)
+
+
+def apply_rating_delta(pet_id, count_delta, total_delta):
+    """
+    Adjust the denormalized rating aggregates of a pet in a single UPDATE.
+    The average is recomputed from the running total so it never drifts
+    through rounding, and rounded half up to the field's two places in the
+    database like reconcile_ratings() does; SQLite would otherwise store
+    the unrounded float.
+    """
+    count = F("rating_count") + count_delta
+    total = F("rating_total") + total_delta
+    updated = Pet.objects.filter(pk=pet_id).update(
+        rating_count=count,
+        rating_total=total,
+        rating_avg=Coalesce(
+            Round(Cast(Cast(total, FloatField()) / NullIf(count, 0), RATING_AVG), 2),
+            Value(Decimal(0)),
+            output_field=RATING_AVG,
+        ),
+        updated_at=Now(),
+    )
+    return updated
+
+
+def reconcile_ratings(pet_ids):
+    """
+    Recompute the rating aggregates of the given pets from the review table
+    and save the ones that drifted. Returns the number of pets fixed.
+    """
+    aggregates = {
+        row["pet_id"]: row
+        for row in Review.objects.filter(pet_id__in=pet_ids)
+        .order_by()
+        .values("pet_id")
+        .annotate(count=Count("id"), total=Sum("ratings"))
+    }
+    stale = []
+    for pet in Pet.objects.filter(pk__in=pet_ids).only(
+        "id", "rating_count", "rating_total", "rating_avg"
+    ):
+        row = aggregates.get(pet.pk, {"count": 0, "total": 0})
+        avg = Decimal(0)
+        if row["count"]:
+            avg = (Decimal(row["total"]) / row["count"]).quantize(
+                Decimal("0.01"), ROUND_HALF_UP
+            )
+        if (pet.rating_count, pet.rating_total, pet.rating_avg) != (
+            row["count"],
+            row["total"],
+            avg,
+        ):
+            pet.rating_count = row["count"]
+            pet.rating_total = row["total"]
+            pet.rating_avg = avg
+            pet.updated_at = timezone.now()
+            stale.append(pet)
+
+    Pet.objects.bulk_update(
+        stale, ["rating_count", "rating_total", "rating_avg", "updated_at"]
+    )
+    return len(stale)
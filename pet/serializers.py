@@ -1,27 +1,78 @@
 from rest_framework import serializers
 from pet.models import Category, Pet, PetImage, Review
+from pet.uploads import create_pending_images
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from api.serializers import DynamicFieldsMixin
 
 
 class CategorySerializer(serializers.ModelSerializer):
     class Meta:
         model = Category
-        fields = ["id", "name", "description", "pet_count"]
+        fields = ["id", "name", "description", "pet_count", "available_pet_count"]
 
     pet_count = serializers.IntegerField(
         read_only=True, help_text="Return the number of pets in this category"
     )
+    available_pet_count = serializers.IntegerField(
+        read_only=True,
+        help_text="Return the number of pets still available in this category",
+    )
+
+
+class StoredURLImageField(serializers.ImageField):
+    """Read the URL stored on the PetImage instead of building it again"""
+
+    def get_attribute(self, instance):
+        return instance.url or super().get_attribute(instance)
+
+    def to_representation(self, value):
+        if isinstance(value, str):
+            return value
+        return super().to_representation(value)
 
 
-class PetImageSerializer(serializers.ModelSerializer):
-    image = serializers.ImageField()
+def stored_image_url(url, image):
+    return url or (image.url if image else None)
+
+
+class PetImageSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    image = StoredURLImageField()
+    thumbnail = serializers.URLField(source="thumbnail_url", read_only=True)
+    medium = serializers.URLField(source="medium_url", read_only=True)
 
     class Meta:
         model = PetImage
-        fields = ["id", "image"]
+        fields = ["id", "image", "thumbnail", "medium"]
+
+    # StoredURLImageField for the api.fast list path
+    fast_method_fields = {"image": (("url", "image"), stored_image_url)}
 
 
-class PetSerializer(serializers.ModelSerializer):
+class PetImageUploadSerializer(serializers.ModelSerializer):
+    image = StoredURLImageField(read_only=True)
+    thumbnail = serializers.URLField(source="thumbnail_url", read_only=True)
+
+    class Meta:
+        model = PetImage
+        fields = ["id", "status", "attempts", "error", "image", "thumbnail"]
+
+
+class PetImageBatchSerializer(serializers.Serializer):
+    images = serializers.ListField(
+        child=serializers.ImageField(),
+        allow_empty=False,
+        max_length=settings.PET_IMAGE_UPLOADS["MAX_FILES"],
+        write_only=True,
+    )
+
+    def create(self, validated_data):
+        return create_pending_images(
+            self.context["pet_id"], validated_data["images"]
+        )
+
+
+class PetSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     images = PetImageSerializer(many=True, read_only=True)
 
     class Meta:
@@ -35,6 +86,8 @@ class PetSerializer(serializers.ModelSerializer):
             "description",
             "availability",
             "price",
+            "rating_avg",
+            "rating_count",
             "images",
         ]  # other
 
@@ -63,6 +116,17 @@ class ReviewSerializer(serializers.ModelSerializer):
         fields = ["id", "user", "pet", "ratings", "comment"]
         read_only_fields = ["user", "pet"]
 
+    # get_user() for the api.fast list path
+    fast_method_fields = {
+        "user": (
+            ("user__id", "user__first_name", "user__last_name"),
+            lambda pk, first_name, last_name: {
+                "id": pk,
+                "name": f"{first_name} {last_name}".strip(),
+            },
+        ),
+    }
+
     def get_user(self, obj):
         return SimpleUserSerializer(obj.user).data
 
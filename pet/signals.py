@@ -0,0 +1,109 @@
+from django.contrib.auth import get_user_model
+from django.db.models.functions import Now
+from django.db.models.signals import post_delete, post_init, post_save, pre_delete
+from django.dispatch import receiver
+from pet.counts import apply_category_delta, reconcile_category_counts
+from pet.images import set_image_urls
+from pet.models import Category, Pet, PetImage, Review
+from pet.search import update_search_vectors
+
+
+@receiver(post_init, sender=Pet)
+def remember_pet_category(sender, instance, **kwargs):
+    # Read through __dict__ so deferred fields are not fetched.
+    instance._loaded_category_id = instance.__dict__.get("category_id")
+    instance._loaded_availability = instance.__dict__.get("availability")
+
+
+def update_category_counts(instance, created):
+    """
+    Keep Category.pet_count/available_pet_count in step with a saved pet.
+    Fields missing from ``__dict__`` were deferred and therefore unchanged;
+    when the previous value can't be known the counts are recomputed.
+    """
+    category_id = instance.__dict__.get("category_id")
+    availability = instance.__dict__.get("availability")
+    loaded_category_id = instance._loaded_category_id
+    loaded_availability = instance._loaded_availability
+    instance._loaded_category_id = category_id
+    instance._loaded_availability = availability
+
+    if created:
+        apply_category_delta(category_id, 1, int(availability))
+    elif category_id is None:
+        if availability is not None and availability != loaded_availability:
+            reconcile_category_counts(
+                Pet.objects.filter(pk=instance.pk).values("category_id")
+            )
+    elif loaded_category_id is None:
+        reconcile_category_counts(Category.objects.values("pk"))
+    elif loaded_category_id != category_id:
+        if None in (loaded_availability, availability):
+            reconcile_category_counts([loaded_category_id, category_id])
+        else:
+            apply_category_delta(loaded_category_id, -1, -int(loaded_availability))
+            apply_category_delta(category_id, 1, int(availability))
+    elif loaded_availability != availability:
+        if None in (loaded_availability, availability):
+            reconcile_category_counts([category_id])
+        else:
+            apply_category_delta(category_id, 0, 1 if availability else -1)
+
+
+@receiver(post_save, sender=Pet)
+def update_saved_pet(sender, instance, created, **kwargs):
+    update_category_counts(instance, created)
+    update_search_vectors(Pet.objects.filter(pk=instance.pk))
+
+
+@receiver(post_delete, sender=Pet)
+def update_deleted_pet(sender, instance, **kwargs):
+    # Deleted pets are loaded in full by the collector.
+    apply_category_delta(instance.category_id, -1, -int(instance.availability))
+
+
+@receiver(post_save, sender=PetImage)
+def store_pet_image_urls(sender, instance, **kwargs):
+    # The image is uploaded by CloudinaryField.pre_save(), so its URLs are
+    # only known once the row is saved.
+    changed = set_image_urls(instance)
+    if changed:
+        PetImage.objects.filter(pk=instance.pk).update(
+            **{field: getattr(instance, field) for field in changed}
+        )
+
+
+@receiver([post_save, post_delete], sender=PetImage)
+def touch_image_pet(sender, instance, **kwargs):
+    # Pets embed their images: touch the pet for the catalog cache
+    Pet.objects.filter(pk=instance.pet_id).update(updated_at=Now())
+
+
+@receiver(post_init, sender=get_user_model())
+def remember_user_name(sender, instance, **kwargs):
+    instance._loaded_name = (
+        instance.__dict__.get("first_name"),
+        instance.__dict__.get("last_name"),
+    )
+
+
+@receiver(post_save, sender=get_user_model())
+def touch_reviewer_reviews(sender, instance, **kwargs):
+    # Reviews embed their author's name
+    name = (instance.__dict__.get("first_name"), instance.__dict__.get("last_name"))
+    if name != instance._loaded_name:
+        instance._loaded_name = name
+        Review.objects.filter(user=instance).update(updated_at=Now())
+
+
+@receiver(post_save, sender=Category)
+def reindex_category_pets(sender, instance, created, **kwargs):
+    if not created:
+        update_search_vectors(Pet.objects.filter(category=instance))
+
+
+@receiver(pre_delete, sender=get_user_model())
+def remove_user_reviews(sender, instance, **kwargs):
+    # Go through ReviewQuerySet.delete() so the rating aggregates are updated
+    # before the cascade removes the reviews.
+    Review.objects.filter(user=instance).delete()
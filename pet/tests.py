@@ -1,3 +1,753 @@
-from django.test import TestCase
+import base64
+import io
+import json
+import os
+import tempfile
+import uuid
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from cloudinary import CloudinaryResource
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+
+from api.benchmarks import grow_samples, seed_samples
+from api.fast import FastSerializer
+from adoption.models import AdoptionHistory, Payment
+from adoption.serializers import AdoptionHistorySerializer, PaymentSerializer
+from adoption.services import adopt_pet
+from api.management.commands.explain_endpoints import filter_queries, unindexed_scans
+from pet import processing, uploads
+from pet.cache import get_catalog_cache
+from pet.images import VARIANTS
+from pet.models import Category, Pet, PetImage, Review
+from pet.ratings import apply_rating_delta, reconcile_ratings
+from pet.serializers import CategorySerializer, PetSerializer, ReviewSerializer
+from users.models import User
+
+
+@contextmanager
+def stub_cloudinary():
+    """Answer Cloudinary uploads locally with what the upload API returns"""
+
+    def upload(file, **options):
+        public_id = options.get("public_id") or f"stub/{uuid.uuid4().hex}"
+        return {
+            "public_id": public_id,
+            "version": 1700000000,
+            "format": "jpg",
+            "type": options.get("type", "upload"),
+            "resource_type": options.get("resource_type", "image"),
+            "width": 640,
+            "height": 480,
+        }
+
+    with mock.patch("cloudinary.uploader.upload", side_effect=upload) as stub:
+        yield stub
+
+
+def image_file(name="pet.jpg"):
+    return SimpleUploadedFile(name, b"\xff\xd8\xff\xd9", content_type="image/jpeg")
+
+
+def cursor(payload):
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+
+class KeysetPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name="Dogs")
+        # Three pages of pets, with runs of equal prices, ratings and ranks
+        for i in range(25):
+            Pet.objects.create(
+                name=f"Golden {i}" if i % 2 else f"Pet {i}",
+                category=category,
+                breed="Retriever",
+                age=i + 1,
+                description="Golden and friendly" if i % 5 else "Friendly",
+                availability=True,
+                price=10 + i // 3,
+            )
+        for i, pet in enumerate(Pet.objects.order_by("pk")):
+            Pet.objects.filter(pk=pet.pk).update(rating_avg=i % 4)
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def walk(self, **params):
+        """Follow ``next`` to the last page then ``previous`` back to the first"""
+        pages = []
+        response = self.client.get("/api/v1/pets/", {"cursor": "", **params})
+        while True:
+            self.assertEqual(response.status_code, 200)
+            pages.append([pet["id"] for pet in response.data["results"]])
+            if not response.data["next"]:
+                break
+            response = self.client.get(response.data["next"])
+        backwards = [pages[-1]]
+        while response.data["previous"]:
+            response = self.client.get(response.data["previous"])
+            self.assertEqual(response.status_code, 200)
+            backwards.append([pet["id"] for pet in response.data["results"]])
+        self.assertGreater(len(pages), 2)
+        self.assertEqual(backwards[::-1], pages)
+        return [pk for page in pages for pk in page]
+
+    def test_pages_follow_the_cursor(self):
+        for ordering in ["price", "-price", "-rating_avg"]:
+            pk = "-pk" if ordering.startswith("-") else "pk"
+            expected = list(
+                Pet.objects.order_by(ordering, pk).values_list("pk", flat=True)
+            )
+            with self.subTest(ordering=ordering):
+                self.assertEqual(self.walk(ordering=ordering), expected)
+
+    @skipUnless(connection.vendor == "postgresql", "Ranked search needs PostgreSQL")
+    def test_search_results_keep_their_rank_order(self):
+        # Page numbers page through the ranked queryset with OFFSET
+        ranked = []
+        for page in (1, 2, 3):
+            response = self.client.get(
+                "/api/v1/pets/", {"search": "golden", "page": page}
+            )
+            ranked += [pet["id"] for pet in response.data["results"]]
+        self.assertEqual(self.walk(search="golden"), ranked)
+
+    def test_malformed_cursor_values_are_not_found(self):
+        for value in ["abc", {"a": 1}, [1], None]:
+            with self.subTest(value=value):
+                response = self.client.get(
+                    "/api/v1/pets/",
+                    {
+                        "ordering": "price",
+                        "cursor": cursor({"o": "price", "v": value, "id": 1, "r": 0}),
+                    },
+                )
+                self.assertEqual(response.status_code, 404)
+
+
+class CategoryCountTests(TestCase):
+    def setUp(self):
+        self.category = Category.objects.create(name="Cats")
+        self.pets = Pet.objects.bulk_create(
+            Pet(
+                name=f"Pet {i}",
+                category=self.category,
+                breed="Mixed",
+                age=1,
+                description="Friendly",
+                availability=True,
+                price=10,
+            )
+            for i in range(3)
+        )
+
+    def assertCounts(self, total, available):
+        self.category.refresh_from_db()
+        self.assertEqual(
+            (self.category.pet_count, self.category.available_pet_count),
+            (total, available),
+        )
+
+    def test_saved_pets_update_the_counts(self):
+        Pet.objects.create(
+            name="Saved",
+            category=self.category,
+            breed="Mixed",
+            age=1,
+            description="Friendly",
+            availability=False,
+            price=10,
+        )
+        self.assertCounts(1, 0)
+
+    def test_decrements_recount_drifted_categories(self):
+        # bulk_create() skipped the signals, the counts are still zero
+        self.assertCounts(0, 0)
+        pet = Pet.objects.get(pk=self.pets[0].pk)
+        pet.availability = False
+        pet.save()
+        self.assertCounts(3, 2)
+        Pet.objects.get(pk=self.pets[1].pk).delete()
+        self.assertCounts(2, 1)
+
+    def test_category_delete_with_drifted_counts(self):
+        self.category.delete()
+        self.assertFalse(Pet.objects.filter(category_id=self.category.pk).exists())
+
+
+class RatingAggregateTests(TestCase):
+    def setUp(self):
+        self.pet = Pet.objects.create(
+            name="Rated",
+            category=Category.objects.create(name="Rated"),
+            breed="Mixed",
+            age=1,
+            description="Friendly",
+            availability=True,
+            price=10,
+        )
+        self.user = User.objects.create_user(email="rater@example.com")
+
+    def test_incremental_averages_match_a_reconcile(self):
+        # 13 / 8 = 1.625 rounds to 1.62 half-even but 1.63 half-up
+        averages = []
+        for ratings in [1, 1, 1, 2, 2, 2, 2, 2, 5, 1, 5, 4]:
+            Review.objects.create(
+                pet=self.pet, user=self.user, ratings=ratings, comment="Nice"
+            )
+            apply_rating_delta(self.pet.pk, 1, ratings)
+            self.pet.refresh_from_db()
+            averages.append(self.pet.rating_avg)
+            self.assertEqual(reconcile_ratings([self.pet.pk]), 0)
+
+        self.assertEqual(averages[7], Decimal("1.63"))
+        self.assertEqual(averages[-1], Decimal("2.33"))
+
+
+class QueryCountTests(TestCase):
+    """
+    Catalog endpoints run a fixed number of queries with a cold cache,
+    however many rows they list (see check_query_budgets).
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.samples = seed_samples()
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def assertQueries(self, num, name, **kwargs):
+        url = reverse(name, kwargs=kwargs)
+        get_catalog_cache().clear()
+        with self.assertNumQueries(num):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+
+    def test_pets(self):
+        self.assertQueries(4, "pets-list")
+        self.assertQueries(3, "pets-detail", pk=self.samples["pet"].pk)
+
+    def test_categories(self):
+        self.assertQueries(2, "category-list")
+        self.assertQueries(2, "category-detail", pk=self.samples["category"].pk)
+
+    def test_reviews(self):
+        pet_pk = self.samples["pet"].pk
+        self.assertQueries(2, "pet-review-list", pet_pk=pet_pk)
+        self.assertQueries(
+            2, "pet-review-detail", pet_pk=pet_pk, pk=self.samples["review"].pk
+        )
+
+    def test_images(self):
+        pet_pk = self.samples["pet"].pk
+        self.assertQueries(1, "pet-images-list", pet_pk=pet_pk)
+        self.assertQueries(
+            1, "pet-images-detail", pet_pk=pet_pk, pk=self.samples["image"].pk
+        )
+
+    def test_counts_do_not_grow_with_data(self):
+        grow_samples(self.samples, 10)
+        self.test_pets()
+        self.test_categories()
+        self.test_reviews()
+        self.test_images()
+
+
+class ConditionalRequestTests(TestCase):
+    """
+    Catalog ETags and Last-Modified come from the data. on_commit callbacks
+    don't run in a TestCase, so the writes here leave this process' cache
+    versions alone, like writes made by another worker.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.samples = seed_samples()
+
+    def setUp(self):
+        self.client = APIClient()
+        self.clock = timezone.now()
+        get_catalog_cache().clear()
+
+    def status(self, url, **headers):
+        return self.client.get(url, headers=headers).status_code
+
+    def assertRevalidated(self, url, edit, modified_since=True):
+        """
+        Conditional GETs are answered with 304 until ``edit()`` runs, then
+        with the new representation. ``modified_since`` when the edit moves
+        the data to a later second, the resolution of Last-Modified.
+        """
+        response = self.client.get(url)
+        etag, last_modified = response["ETag"], response["Last-Modified"]
+        self.assertEqual(self.status(url, if_none_match=etag), 304)
+        self.assertEqual(self.status(url, if_modified_since=last_modified), 304)
+        edit()
+        response = self.client.get(url, headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(self.status(url, if_none_match=response["ETag"]), 304)
+        if modified_since:
+            self.assertEqual(self.status(url, if_modified_since=last_modified), 200)
+        return response
+
+    def later(self):
+        """A time in a later second than any write so far"""
+        self.clock += timedelta(seconds=5)
+        return self.clock
+
+    def test_pets(self):
+        pet = self.samples["pet"]
+        for url in [reverse("pets-list"), reverse("pets-detail", args=[pet.pk])]:
+            with self.subTest(url=url):
+                self.assertRevalidated(
+                    url,
+                    lambda: Pet.objects.filter(pk=pet.pk).update(
+                        price=pet.price + 1, updated_at=self.later()
+                    ),
+                )
+
+    def test_pet_images(self):
+        url = reverse("pets-detail", args=[self.samples["pet"].pk])
+        self.assertRevalidated(
+            url, lambda: self.samples["image"].delete(), modified_since=False
+        )
+
+    def test_categories(self):
+        category = self.samples["category"]
+        for url in [
+            reverse("category-list"),
+            reverse("category-detail", args=[category.pk]),
+        ]:
+            with self.subTest(url=url):
+                self.assertRevalidated(
+                    url,
+                    lambda: Category.objects.filter(pk=category.pk).update(
+                        description="Updated", updated_at=self.later()
+                    ),
+                )
+
+    def test_reviews(self):
+        review = self.samples["review"]
+        url = reverse("pet-review-list", kwargs={"pet_pk": review.pet_id})
+        self.assertRevalidated(
+            url, lambda: Review.objects.filter(pk=review.pk).delete(), False
+        )
+
+    def test_reviewer_names(self):
+        review = self.samples["review"]
+        url = reverse("pet-review-list", kwargs={"pet_pk": review.pet_id})
+
+        def rename():
+            review.user.first_name = "Renamed"
+            review.user.save()
+
+        self.assertRevalidated(url, rename, modified_since=False)
+
+
+class CatalogCacheTests(TestCase):
+    """Writes show up on the next request, cached entries or not"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.samples = seed_samples()
+
+    def setUp(self):
+        self.client = APIClient()
+        get_catalog_cache().clear()
+
+    def assertRefreshed(self, url, write):
+        """Prime the cache for ``url``, run ``write()`` and GET it again"""
+        self.client.get(url)
+        self.assertEqual(self.client.get(url)["X-Cache"], "HIT")
+        write()
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["X-Cache"], "MISS")
+        return response.data
+
+    def test_pet_edits(self):
+        first = self.client.get(reverse("pets-list")).data["results"][0]
+        pet = Pet.objects.get(pk=first["id"])
+
+        def rename():
+            pet.name = "Renamed"
+            pet.save()
+
+        data = self.assertRefreshed(reverse("pets-list"), rename)
+        self.assertEqual(data["results"][0]["name"], "Renamed")
+        pet.name = "Renamed again"
+        data = self.assertRefreshed(reverse("pets-detail", args=[pet.pk]), pet.save)
+        self.assertEqual(data["name"], "Renamed again")
+
+    def test_category_edits(self):
+        category = self.samples["category"]
+        category.description = "Updated"
+        data = self.assertRefreshed(reverse("category-list"), category.save)
+        self.assertIn("Updated", [row["description"] for row in data])
+
+    def test_reviews(self):
+        pet, user = self.samples["pet"], self.samples["user"]
+        url = reverse("pet-review-list", kwargs={"pet_pk": pet.pk})
+        count = len(self.client.get(url).data)
+        data = self.assertRefreshed(
+            url,
+            lambda: Review.objects.create(
+                pet=pet, user=user, ratings=5, comment="Lovely"
+            ),
+        )
+        self.assertEqual(len(data), count + 1)
+
+    def test_adoptions(self):
+        pet, user = self.samples["pet"], self.samples["user"]
+        Pet.objects.filter(pk=pet.pk).update(availability=True)
+        User.objects.filter(pk=user.pk).update(account_balance=pet.price)
+        user.refresh_from_db()
+        data = self.assertRefreshed(
+            reverse("pets-detail", args=[pet.pk]), lambda: adopt_pet(user, pet.pk)
+        )
+        self.assertFalse(data["availability"])
+
+
+@skipUnless(connection.vendor == "postgresql", "Index plans are checked on PostgreSQL")
+class FilterIndexTests(TestCase):
+    """Every PetFilter filter is answered from an index (see explain_endpoints)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.samples = seed_samples()
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+    def test_filters_use_indexes(self):
+        for name, sql, params in filter_queries(self.samples):
+            with self.subTest(filter=name):
+                self.assertEqual(unindexed_scans(sql, params), set(), sql)
+
+
+class FastSerializerTests(TestCase):
+    """FastSerializer renders the same JSON as the DRF serializers"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.samples = seed_samples()
+
+    def assertSameOutput(self, serializer_class, queryset, path="/"):
+        context = {"request": Request(APIRequestFactory().get(path))}
+        expected = serializer_class(queryset, many=True, context=context).data
+        fast = FastSerializer(serializer_class(context=context))
+        actual = fast.to_representation(fast.values(queryset))
+        self.assertTrue(expected)
+        self.assertEqual(
+            JSONRenderer().render(actual).decode(),
+            JSONRenderer().render(expected).decode(),
+        )
+
+    def test_pets(self):
+        queryset = Pet.objects.defer("search_vector").prefetch_related("images")
+        for path in ["/", "/?fields=id,name,price,images", "/?omit=description"]:
+            with self.subTest(path=path):
+                self.assertSameOutput(PetSerializer, queryset, path)
+
+    def test_reviews(self):
+        queryset = Review.objects.select_related("user").order_by("-id")
+        self.assertSameOutput(ReviewSerializer, queryset)
+
+    def test_categories(self):
+        self.assertSameOutput(CategorySerializer, Category.objects.all())
+
+    def test_adoption_histories(self):
+        queryset = AdoptionHistory.objects.for_user(self.samples["user"]).order_by(
+            "-id"
+        )
+        for path in ["/", "/?fields=id,pet.name,pet.price", "/?omit=pet.images"]:
+            with self.subTest(path=path):
+                self.assertSameOutput(AdoptionHistorySerializer, queryset, path)
+
+    def test_payments(self):
+        queryset = (
+            Payment.objects.filter(user=self.samples["user"])
+            .select_related("adoption__pet")
+            .order_by("-created_at")
+        )
+        self.assertSameOutput(PaymentSerializer, queryset)
+
+
+class PetImageURLTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name="Dogs")
+        cls.pet = Pet.objects.create(
+            name="Rex",
+            category=category,
+            breed="Mixed",
+            age=1,
+            description="Friendly",
+            availability=True,
+            price=10,
+        )
+
+    def test_urls_are_stored_at_upload(self):
+        with stub_cloudinary() as upload:
+            pet_image = PetImage.objects.create(pet=self.pet, image=image_file())
+        upload.assert_called_once()
+        pet_image.refresh_from_db()
+        self.assertEqual(pet_image.url, pet_image.image.url)
+        for field, transformation in VARIANTS.items():
+            self.assertEqual(
+                getattr(pet_image, field), pet_image.image.build_url(**transformation)
+            )
+
+    def test_responses_do_not_build_urls(self):
+        with stub_cloudinary():
+            pet_image = PetImage.objects.create(pet=self.pet, image=image_file())
+        pet_image.refresh_from_db()
+        client = APIClient()
+        with mock.patch.object(
+            CloudinaryResource, "build_url", side_effect=AssertionError
+        ):
+            for fast in (True, False):
+                with self.settings(FAST_SERIALIZERS=fast):
+                    get_catalog_cache().clear()
+                    response = client.get("/api/v1/pets/")
+                image = response.data["results"][0]["images"][0]
+                self.assertEqual(image["image"], pet_image.url)
+                self.assertEqual(image["thumbnail"], pet_image.thumbnail_url)
+                self.assertEqual(image["medium"], pet_image.medium_url)
+
+
+class PetImageURLMigrationTests(TransactionTestCase):
+    """0009 fills the URL fields of existing images with its frozen variants"""
+
+    before = [("pet", "0008_pet_filter_indexes")]
+    after = [("pet", "0009_petimage_urls")]
+
+    def tearDown(self):
+        MigrationExecutor(connection).migrate(
+            MigrationExecutor(connection).loader.graph.leaf_nodes()
+        )
+
+    def test_existing_images_get_urls(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.before)
+        apps = executor.loader.project_state(self.before).apps
+        category = apps.get_model("pet", "Category").objects.create(name="Dogs")
+        pet = apps.get_model("pet", "Pet").objects.create(
+            name="Rex",
+            category=category,
+            breed="Mixed",
+            age=1,
+            description="Friendly",
+            availability=True,
+            price=10,
+        )
+        apps.get_model("pet", "PetImage").objects.create(
+            pet=pet, image="image/upload/v1/fur-nest/rex.jpg"
+        )
+
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.after)
+        apps = executor.loader.project_state(self.after).apps
+        pet_image = apps.get_model("pet", "PetImage").objects.get()
+        resource = CloudinaryResource("fur-nest/rex", format="jpg", version="1")
+        self.assertEqual(pet_image.url, resource.url)
+        self.assertIn("w_320", pet_image.thumbnail_url)
+        self.assertIn("w_960", pet_image.medium_url)
+
+
+def jpeg_bytes(size=(2000, 1500)):
+    output = io.BytesIO()
+    Image.new("RGB", size, "orange").save(output, "JPEG")
+    return output.getvalue()
+
+
+class ImageProcessingTests(TestCase):
+    def test_images_are_resized_and_reencoded(self):
+        data = processing.process(jpeg_bytes())
+        with Image.open(io.BytesIO(data)) as image:
+            self.assertEqual(image.format, settings.PET_IMAGE_PROCESSING["FORMAT"])
+            self.assertLessEqual(
+                max(image.size), settings.PET_IMAGE_PROCESSING["MAX_DIMENSION"]
+            )
+
+    def test_broken_pool_is_replaced(self):
+        pool = processing.get_pool()
+        with self.assertRaises(BrokenProcessPool):
+            pool.submit(os._exit, 1).result()
+        self.assertTrue(processing.process(jpeg_bytes((10, 10))))
+        self.assertIsNot(processing.get_pool(), pool)
+
+    def test_pool_shut_down_by_another_thread_is_replaced(self):
+        # As when another thread's discard_pool() runs between get_pool()
+        # and submit()
+        pool = processing.get_pool()
+        pool.shutdown()
+        self.assertTrue(processing.process(jpeg_bytes((10, 10))))
+        self.assertIsNot(processing.get_pool(), pool)
+
+    def test_cancelled_work_is_retried(self):
+        cancelled = Future()
+        cancelled.cancel()
+        shut_down = mock.Mock(**{"submit.return_value": cancelled})
+        pools = [shut_down, processing.get_pool()]
+        with mock.patch.object(processing, "get_pool", side_effect=pools):
+            self.assertTrue(processing.process(jpeg_bytes((10, 10))))
+
+
+class PetImageUploadTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name="Dogs")
+        cls.pet = Pet.objects.create(
+            name="Rex",
+            category=category,
+            breed="Mixed",
+            age=1,
+            description="Friendly",
+            availability=True,
+            price=10,
+        )
+        cls.admin = User.objects.create_superuser("admin@example.com", "secret")
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        overridden = override_settings(
+            PET_IMAGE_UPLOADS={
+                **settings.PET_IMAGE_UPLOADS,
+                "BACKEND": "pet.uploads.LocalBackend",
+                "STAGING_DIR": os.path.join(directory.name, "staging"),
+                "LOCAL_DIR": os.path.join(directory.name, "uploaded"),
+            }
+        )
+        overridden.enable()
+        self.addCleanup(overridden.disable)
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def test_create_returns_before_processing(self):
+        url = reverse("pet-images-list", kwargs={"pet_pk": self.pet.pk})
+        photo = SimpleUploadedFile("photo.jpg", jpeg_bytes(), "image/jpeg")
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = self.client.post(url, {"image": photo}, format="multipart")
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data["status"], PetImage.PENDING)
+        self.assertEqual(len(callbacks), 1)
+
+        # What the background worker runs once the request committed
+        self.assertEqual(uploads.upload(response.data["id"]), PetImage.READY)
+        pet_image = PetImage.objects.get(pk=response.data["id"])
+        self.assertTrue(pet_image.image.public_id.startswith("fur-nest/"))
+        self.assertTrue(pet_image.thumbnail_url)
+
+    def test_update_restages_the_image(self):
+        with stub_cloudinary():
+            pet_image = PetImage.objects.create(pet=self.pet, image=image_file())
+        url = reverse(
+            "pet-images-detail", kwargs={"pet_pk": self.pet.pk, "pk": pet_image.pk}
+        )
+        photo = SimpleUploadedFile("photo.jpg", jpeg_bytes(), "image/jpeg")
+        with self.captureOnCommitCallbacks():
+            response = self.client.put(url, {"image": photo}, format="multipart")
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(uploads.upload(pet_image.pk), PetImage.READY)
+        pet_image.refresh_from_db()
+        self.assertTrue(pet_image.image.public_id.startswith("fur-nest/"))
+        self.assertNotEqual(pet_image.url, "")
+
+    def test_staging_directory_is_created_on_first_use(self):
+        staging_dir = settings.PET_IMAGE_UPLOADS["STAGING_DIR"]
+        self.assertFalse(os.path.exists(staging_dir))
+        path = uploads.stage(image_file())
+        self.assertEqual(str(path.parent), staging_dir)
+        self.assertTrue(path.is_file())
+
+    def pending_image(self):
+        photo = SimpleUploadedFile("photo.jpg", jpeg_bytes(), "image/jpeg")
+        with self.captureOnCommitCallbacks():
+            (pet_image,) = uploads.create_pending_images(self.pet.pk, [photo])
+        return pet_image
+
+    def test_processing_crashes_fail_the_image(self):
+        pet_image = self.pending_image()
+        crash = RuntimeError("cannot schedule new futures after shutdown")
+        with mock.patch.object(uploads, "process_path", side_effect=crash):
+            with self.assertLogs("pet.uploads", "ERROR"):
+                self.assertEqual(uploads.upload(pet_image.pk), PetImage.FAILED)
+        pet_image.refresh_from_db()
+        self.assertEqual(pet_image.status, PetImage.FAILED)
+        self.assertIn("RuntimeError", pet_image.error)
+
+    def test_retries_upload_the_processed_file(self):
+        pet_image = self.pending_image()
+        down = mock.Mock(**{"upload.side_effect": OSError("Cloudinary is down")})
+        options = {**settings.PET_IMAGE_UPLOADS, "MAX_ATTEMPTS": 1}
+        with override_settings(PET_IMAGE_UPLOADS=options):
+            with self.assertLogs("pet.uploads", "WARNING"):
+                self.assertEqual(
+                    uploads.upload(pet_image.pk, backend=down), PetImage.FAILED
+                )
+        pet_image.refresh_from_db()
+        self.assertTrue(os.path.exists(pet_image.staged_file))
+
+        with mock.patch.object(processing, "process") as process:
+            self.assertEqual(uploads.upload(pet_image.pk), PetImage.READY)
+        process.assert_not_called()
+
+
+class PetImportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser("admin@example.com", "secret")
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def post(self, name, content):
+        upload = SimpleUploadedFile(name, content)
+        return self.client.post(
+            reverse("pets-import-pets"), {"file": upload}, format="multipart"
+        )
+
+    def test_undecodable_lines_fail_their_row_only(self):
+        content = (
+            "name,category_name,breed,age,description,availability,price\n"
+            "Rex,Dogs,Mixed,2,Friendly,true,10\n"
+            "Ren\xe9,Dogs,Mixed,2,Friendly,true,10\n"
+            "Tom,Cats,Mixed,3,Calm,true,12\n"
+        ).encode("latin-1")
+        response = self.post("pets.csv", content)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["created"], 2)
+        self.assertEqual(response.data["failed"], 1)
+        self.assertEqual(response.data["errors"][0]["line"], 3)
+        self.assertEqual(
+            sorted(Pet.objects.values_list("name", flat=True)), ["Rex", "Tom"]
+        )
+
+    def test_undecodable_ndjson_lines_fail_their_row_only(self):
+        row = '{"name": "%s", "category_name": "Dogs", "breed": "Mixed", "age": 2, '
+        row += '"description": "Friendly", "availability": true, "price": "10"}\n'
+        content = (row % "Rex").encode() + (row % "Ren\xe9").encode("latin-1")
+        response = self.post("pets.ndjson", content)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data["created"], response.data["failed"]), (1, 1))
+        self.assertEqual(response.data["errors"][0]["line"], 2)
@@ -0,0 +1,219 @@
+import logging
+import shutil
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import cloudinary.uploader
+from cloudinary import CloudinaryResource
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import close_old_connections, transaction
+from django.db.models.functions import Now
+from django.utils.module_loading import import_string
+from pet.images import URL_FIELDS, set_image_urls
+from pet.models import PetImage
+from pet.processing import process_path
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+class CloudinaryBackend:
+    """Upload staged files to Cloudinary"""
+
+    def __init__(self, options):
+        self.folder = options["FOLDER"]
+
+    def upload(self, path):
+        result = cloudinary.uploader.upload(
+            str(path), folder=self.folder, resource_type="image"
+        )
+        return CloudinaryResource(
+            result["public_id"],
+            format=result.get("format"),
+            version=str(result["version"]),
+            type=result["type"],
+            resource_type=result["resource_type"],
+            metadata=result,
+        )
+
+
+class LocalBackend:
+    """
+    Copy staged files to ``LOCAL_DIR``, standing in for Cloudinary in
+    development and offline tests. The images keep Cloudinary-style public
+    ids so URLs are built the same way.
+    """
+
+    def __init__(self, options):
+        self.folder = options["FOLDER"]
+        self.directory = Path(options["LOCAL_DIR"])
+
+    def upload(self, path):
+        path = Path(path)
+        public_id = f"{self.folder}/{path.stem}"
+        target = self.directory / f"{path.stem}{path.suffix}"
+        target.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(path, target)
+        return CloudinaryResource(
+            public_id,
+            format=path.suffix.lstrip(".").lower() or None,
+            version=str(int(time.time())),
+            type="upload",
+            resource_type="image",
+        )
+
+
+def get_backend():
+    options = settings.PET_IMAGE_UPLOADS
+    return import_string(options["BACKEND"])(options)
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.PET_IMAGE_UPLOADS["WORKERS"],
+                thread_name_prefix="pet-image-upload",
+            )
+        return _executor
+
+
+def stage(uploaded_file):
+    """Write an uploaded file to the staging directory and return its path"""
+    directory = Path(settings.PET_IMAGE_UPLOADS["STAGING_DIR"])
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"{uuid.uuid4().hex}{Path(uploaded_file.name).suffix.lower()}"
+    with path.open("wb") as staged:
+        for chunk in uploaded_file.chunks():
+            staged.write(chunk)
+    return path
+
+
+def create_pending_images(pet_id, uploaded_files):
+    """
+    Stage ``uploaded_files`` and create a pending PetImage for each one. The
+    uploads are queued once the surrounding transaction commits.
+    """
+    paths = [stage(uploaded_file) for uploaded_file in uploaded_files]
+    images = PetImage.all_objects.bulk_create(
+        PetImage(pet_id=pet_id, status=PetImage.PENDING, staged_file=str(path))
+        for path in paths
+    )
+    ids = [image.pk for image in images]
+    transaction.on_commit(lambda: schedule(ids))
+    return images
+
+
+def restage_image(pet_image, uploaded_file):
+    """
+    Stage a new file for ``pet_image`` and queue its upload like a new
+    image's; the image is hidden until the new file is ready.
+    """
+    pet_image.staged_file = str(stage(uploaded_file))
+    pet_image.status = PetImage.PENDING
+    pet_image.attempts = 0
+    pet_image.error = ""
+    pet_image.save(
+        update_fields=["staged_file", "status", "attempts", "error", "updated_at"]
+    )
+    transaction.on_commit(lambda: schedule([pet_image.pk]))
+    return pet_image
+
+
+def schedule(image_ids):
+    executor = get_executor()
+    for image_id in image_ids:
+        executor.submit(run_upload, image_id)
+
+
+def run_upload(image_id):
+    """Thread pool entry point: upload with fresh database connections"""
+    close_old_connections()
+    try:
+        upload(image_id)
+    except Exception:
+        logger.exception("Upload of pet image %s crashed", image_id)
+    finally:
+        close_old_connections()
+
+
+def upload(image_id, backend=None):
+    """
+    Process and upload the staged file of a pending PetImage, retrying the
+    upload with exponential backoff, and mark it ready or failed. Returns
+    the final status, or None when another worker already claimed the image.
+    """
+    claimed = PetImage.all_objects.filter(
+        pk=image_id, status__in=[PetImage.PENDING, PetImage.FAILED]
+    ).update(status=PetImage.UPLOADING, updated_at=Now())
+    if not claimed:
+        return None
+
+    options = settings.PET_IMAGE_UPLOADS
+    backend = backend or get_backend()
+    image = PetImage.all_objects.get(pk=image_id)
+    try:
+        staged_file = str(process_path(image.staged_file))
+    except Exception as error:
+        # Retrying won't help a file that can't be read or processed; other
+        # errors leave the image failed too, for retry_pet_image_uploads
+        if not isinstance(error, (ValidationError, FileNotFoundError)):
+            logger.exception("Processing of pet image %s crashed", image_id)
+        image.attempts += 1
+        image.error = f"{type(error).__name__}: {error}"
+        image.status = PetImage.FAILED
+        image.save(update_fields=["status", "attempts", "error", "updated_at"])
+        return image.status
+    if staged_file != image.staged_file:
+        # The original is gone: a retry must find the processed file
+        image.staged_file = staged_file
+        PetImage.all_objects.filter(pk=image_id).update(staged_file=staged_file)
+
+    delay = options["RETRY_DELAY"]
+    for attempt in range(1, options["MAX_ATTEMPTS"] + 1):
+        image.attempts += 1
+        try:
+            resource = backend.upload(image.staged_file)
+        except Exception as error:
+            image.error = f"{type(error).__name__}: {error}"
+            logger.warning(
+                "Upload of pet image %s failed (attempt %s): %s",
+                image_id,
+                image.attempts,
+                image.error,
+            )
+            if attempt < options["MAX_ATTEMPTS"]:
+                time.sleep(delay)
+                delay *= 2
+        else:
+            Path(image.staged_file).unlink(missing_ok=True)
+            image.image = resource
+            image.staged_file = ""
+            image.error = ""
+            image.status = PetImage.READY
+            set_image_urls(image)
+            break
+    else:
+        image.status = PetImage.FAILED
+
+    # save() also fires the post_save signal that touches the pet, whose
+    # catalog entries are then rebuilt
+    image.save(
+        update_fields=[
+            "image",
+            "status",
+            "staged_file",
+            "attempts",
+            "error",
+            "updated_at",
+            *URL_FIELDS,
+        ]
+    )
+    return image.status
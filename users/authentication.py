@@ -0,0 +1,107 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+# Never cached: loaded from the database when read, so password checks and
+# money-moving code always see the authoritative row.
+UNCACHED_FIELDS = {"password", "account_balance"}
+
+
+def get_user_cache():
+    return caches[settings.AUTH_USER_CACHE["ALIAS"]]
+
+
+def _version_key(user_id):
+    return f"auth:user-version:{user_id}"
+
+
+def _user_key(user_id):
+    return f"auth:user:{user_id}"
+
+
+def bump_user_version(user_id):
+    cache = get_user_cache()
+    try:
+        cache.incr(_version_key(user_id))
+    except ValueError:
+        cache.set(_version_key(user_id), time.time_ns(), None)
+
+
+def invalidate_user(user_id):
+    """Drop the cached user once the current transaction commits"""
+    transaction.on_commit(lambda: bump_user_version(user_id))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication resolving the token's user from the cache instead of
+    a query per request.
+
+    Entries hold the user's row (minus UNCACHED_FIELDS) along with the
+    user's version at the time it was read; saving or deleting the user
+    (is_active, is_staff...) bumps the version (see users.signals), as do
+    ``update()`` and ``bulk_update()`` on users (see users.managers), so
+    older entries stop matching. A read stored after a concurrent change
+    carries the old version and is never served. Groups and permissions
+    are not part of the entry; the auth backend still reads them when
+    checked. Entries also expire
+    after ``AUTH_USER_CACHE["TIMEOUT"]``, which bounds staleness with
+    per-process caches such as LocMemCache.
+    """
+
+    def get_user(self, validated_token):
+        if not settings.AUTH_USER_CACHE["ENABLED"]:
+            return super().get_user(validated_token)
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(
+                _("Token contained no recognizable user identification")
+            ) from e
+
+        cache = get_user_cache()
+        version_key, user_key = _version_key(user_id), _user_key(user_id)
+        found = cache.get_many([version_key, user_key])
+        version = found.get(version_key)
+        if version is None:
+            version = time.time_ns()
+            cache.add(version_key, version, None)
+            version = cache.get(version_key, version)
+
+        entry = found.get(user_key)
+        if entry is not None and entry[0] == version:
+            user = self.from_entry(entry)
+            if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+                raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+            if api_settings.CHECK_REVOKE_TOKEN:
+                # Compares against the password, which is loaded on access
+                return super().get_user(validated_token)
+            return user
+
+        user = super().get_user(validated_token)
+        cache.set(
+            user_key, self.to_entry(user, version), settings.AUTH_USER_CACHE["TIMEOUT"]
+        )
+        return user
+
+    def cached_fields(self):
+        return [
+            field.attname
+            for field in get_user_model()._meta.concrete_fields
+            if field.name not in UNCACHED_FIELDS
+        ]
+
+    def to_entry(self, user, version):
+        fields = self.cached_fields()
+        return (version, user._state.db, [getattr(user, name) for name in fields])
+
+    def from_entry(self, entry):
+        _, db, values = entry
+        return get_user_model().from_db(db, self.cached_fields(), values)
@@ -1,7 +1,39 @@
 from django.contrib.auth.base_user import BaseUserManager
+from django.db import models, transaction
 
 
-class CustomUserManager(BaseUserManager):
+class UserQuerySet(models.QuerySet):
+    """
+    Drops cached users (users.authentication) on bulk writes, which don't
+    send the save signals users.signals relies on.
+    """
+
+    def update(self, **kwargs):
+        # Imported here: users.authentication loads DRF, keep it off startup
+        from users.authentication import UNCACHED_FIELDS, invalidate_user
+
+        if set(kwargs) <= UNCACHED_FIELDS:
+            return super().update(**kwargs)
+        with transaction.atomic(using=self.db):
+            user_ids = list(self.values_list("pk", flat=True))
+            updated = super().update(**kwargs)
+            for user_id in user_ids:
+                invalidate_user(user_id)
+        return updated
+
+    def bulk_update(self, objs, fields, batch_size=None):
+        from users.authentication import UNCACHED_FIELDS, invalidate_user
+
+        objs = list(objs)
+        with transaction.atomic(using=self.db):
+            updated = super().bulk_update(objs, fields, batch_size)
+            if not set(fields) <= UNCACHED_FIELDS:
+                for obj in objs:
+                    invalidate_user(obj.pk)
+        return updated
+
+
+class CustomUserManager(BaseUserManager.from_queryset(UserQuerySet)):
     def create_user(self, email, password=None, **extra_fields):
         if not email:
             raise ValueError("This Email field must be set")
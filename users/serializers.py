@@ -6,6 +6,7 @@ from rest_framework import serializers
 from adoption.serializers import AdoptionHistorySerializer
 from adoption.models import AdoptionHistory
 from django.contrib.auth import get_user_model
+from api.serializers import DynamicFieldsMixin
 
 # from rest_framework import serializers
 
@@ -24,7 +25,7 @@ class UserCreateSerializer(BaseUserCreateSerializer):
         ]
 
 
-class UserSerializer(BaseUserSerializer):
+class UserSerializer(DynamicFieldsMixin, BaseUserSerializer):
     adoption_history = serializers.SerializerMethodField()
 
     class Meta(BaseUserSerializer.Meta):
@@ -44,9 +45,14 @@ class UserSerializer(BaseUserSerializer):
     read_only_fields = ["id", "email", "adoption_history", "is_staff"]
 
     def get_adoption_history(self, obj):
-        histories = AdoptionHistory.objects.filter(adopt__user=obj).select_related(
-            "pet"
-        )
+        if "adopt" in getattr(obj, "_prefetched_objects_cache", {}):
+            histories = [
+                history
+                for adopt in obj.adopt.all()
+                for history in adopt.adoptions.all()
+            ]
+        else:
+            histories = AdoptionHistory.objects.for_user(obj)
         return AdoptionHistorySerializer(histories, many=True).data
 
 
@@ -1,3 +1,120 @@
+from unittest import mock
+
 from django.test import TestCase
+from django.urls import reverse
+from rest_framework_simplejwt.settings import api_settings
+from api.benchmarks import api_client, grow_samples, seed_samples
+from pet.cache import get_catalog_cache
+from users.authentication import get_user_cache
+from users.models import User
+
+
+class QueryCountTests(TestCase):
+    """
+    Authenticated endpoints run a fixed number of queries, JWT user lookup
+    included, however many rows they list (see check_query_budgets).
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.samples = seed_samples()
+
+    def setUp(self):
+        self.client = api_client(self.samples["user"])
+
+    def assertQueries(self, num, name, **kwargs):
+        url = reverse(name, kwargs=kwargs)
+        get_catalog_cache().clear()
+        get_user_cache().clear()
+        with self.assertNumQueries(num):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+
+    def test_user_me(self):
+        self.assertQueries(3, "user-me")
+
+    def test_balance(self):
+        self.assertQueries(5, "balance-list")
+        self.assertQueries(5, "balance-detail", pk=self.samples["user"].pk)
+
+    def test_payment_history(self):
+        self.assertQueries(2, "payment-history")
+
+    def test_has_adopted(self):
+        self.assertQueries(2, "has-adopted", pet_id=self.samples["pet"].pk)
+
+    def test_counts_do_not_grow_with_data(self):
+        grow_samples(self.samples, 10)
+        self.test_user_me()
+        self.test_balance()
+        self.test_payment_history()
+        self.test_has_adopted()
+
+
+class CachedUserTests(TestCase):
+    """
+    A user cached by CachedJWTAuthentication is never served after a change
+    to their row, however it was written.
+    """
+
+    def setUp(self):
+        get_user_cache().clear()
+        self.user = User.objects.create_user(
+            email="cached@example.com", password="old-password", first_name="Old"
+        )
+        self.client = api_client(self.user)
+        # Caches the user
+        self.assertEqual(self.me().json()["first_name"], "Old")
+
+    def me(self):
+        return self.client.get(reverse("user-me"))
+
+    def test_deactivated_user_is_rejected(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save()
+        self.assertEqual(self.me().status_code, 401)
+
+    def test_bulk_deactivated_user_is_rejected(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            User.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertEqual(self.me().status_code, 401)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = True
+            User.objects.bulk_update([self.user], ["is_active"])
+        self.assertEqual(self.me().status_code, 200)
+
+    def test_changed_password_revokes_tokens(self):
+        # SIMPLE_JWT overrides don't reach modules that imported api_settings
+        with mock.patch.object(api_settings, "CHECK_REVOKE_TOKEN", True):
+            self.client = api_client(self.user)
+            self.assertEqual(self.me().status_code, 200)
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(
+                    reverse("user-set-password"),
+                    {"current_password": "old-password", "new_password": "N3w-pa55!"},
+                )
+            self.assertEqual(response.status_code, 204)
+            self.assertEqual(self.me().status_code, 401)
 
-# Create your tests here.
+    def test_admin_edits_are_served(self):
+        admin = User.objects.create_superuser(email="admin@example.com")
+        self.client.force_login(admin)
+        data = {
+            "email": self.user.email,
+            "first_name": "New",
+            "last_name": "",
+            "address": "",
+            "phone_number": "",
+            "is_active": "on",
+            "date_joined_0": self.user.date_joined.strftime("%Y-%m-%d"),
+            "date_joined_1": self.user.date_joined.strftime("%H:%M:%S"),
+        }
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse("admin:users_user_change", args=[self.user.pk]), data
+            )
+        self.assertEqual(response.status_code, 302)
+        self.client.logout()
+        self.assertEqual(self.me().json()["first_name"], "New")
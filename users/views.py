@@ -2,13 +2,25 @@ from rest_framework import viewsets
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+from django.db import transaction
+from django.db.models import Prefetch, Value
+from django.db.models.functions import Coalesce
 from users.serializers import DepositSerializer, UserSerializer
 from users.models import User
+from adoption.models import Adopt, AdoptionHistory
 from drf_yasg.utils import swagger_auto_schema
+from api.timing import TimedSerializationMixin
 
 
-class AccountBalanceViewset(viewsets.ModelViewSet):
-    queryset = User.objects.all()
+class AccountBalanceViewset(TimedSerializationMixin, viewsets.ModelViewSet):
+    queryset = User.objects.prefetch_related(
+        Prefetch(
+            "adopt",
+            queryset=Adopt.objects.prefetch_related(
+                Prefetch("adoptions", queryset=AdoptionHistory.objects.with_details())
+            ),
+        )
+    )
     serializer_class = UserSerializer
     permission_classes = [IsAuthenticated]
 
@@ -23,11 +35,17 @@ class AccountBalanceViewset(viewsets.ModelViewSet):
         serializer = DepositSerializer(data=request.data)
         if serializer.is_valid():
             values = serializer.validated_data["values"]
-            user = request.user
-            user.account_balance += values
-            user.save()
+            # Credit the row itself; request.user may come from the cache
+            with transaction.atomic():
+                User.objects.filter(pk=request.user.pk).update(
+                    account_balance=Coalesce("account_balance", Value(0)) + values
+                )
+                balance = User.objects.values_list("account_balance", flat=True).get(
+                    pk=request.user.pk
+                )
+            request.user.account_balance = balance
             return Response(
                 {
-                    "account_balance": user.account_balance,
+                    "account_balance": balance,
                 }
             )